@@ -1,25 +1,43 @@
+from typing import Any, Dict
+
 from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
-from app.db.session import get_db
+from app.core.security import decode_access_token, token_revoked
+from app.db.session import get_async_db, get_db
 from app.models import User, UserRole
+from app.services.users import get_user, revocation_watch
 
 
-def get_current_user(authorization: str = Header(...), db: Session = Depends(get_db)) -> User:
+def _token_claims(authorization: str) -> Dict[str, Any]:
     if not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid auth header")
     token = authorization.split()[1]
-    payload = decode_access_token(token)
-    user_id = payload.get("user_id")
-    if user_id is None:
+    claims = decode_access_token(token)
+    if claims.get("user_id") is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    user = db.query(User).filter(User.id == user_id).first()
+    return claims
+
+
+def _authenticated(db: Session, claims: Dict[str, Any]) -> User:
+    revocation_watch.check(db)
+    user = get_user(db, claims["user_id"])
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if token_revoked(claims, user.tokens_valid_after):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return user
 
 
+def get_current_user(authorization: str = Header(...), db: Session = Depends(get_db)) -> User:
+    return _authenticated(db, _token_claims(authorization))
+
+
+async def get_current_user_async(authorization: str = Header(...), db: AsyncSession = Depends(get_async_db)) -> User:
+    return await db.run_sync(_authenticated, _token_claims(authorization))
+
+
 def require_admin(user: User = Depends(get_current_user)) -> User:
     if user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
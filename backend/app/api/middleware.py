@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import math
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.admission import AdmissionController, admission
+from app.core.metrics import MetricsRegistry, metrics
+from app.core.security import token_user_id
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL statements per route template.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, so streamed
+    responses are timed to their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = self.registry.start_request()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label.
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            self.registry.finish_request(token, scope["method"], route, status_code, time.perf_counter() - started)
+
+
+class AdmissionMiddleware:
+    """Shed load on the guarded quiz routes before it reaches the threadpool.
+
+    A user over their rate limit gets 429; a request that finds its route's
+    wait queue full, or waits past the deadline, gets 503. Both carry a
+    ``Retry-After`` so clients back off instead of retrying at once. Admitted
+    requests hold their slot until the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController = admission) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self.controller.limiters.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Requests without a valid token are left to the route, which rejects them.
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        user_id = token_user_id(token) if scheme.lower() == "bearer" else None
+        if user_id is not None:
+            if self.controller.store is not None and self.controller.store.blocking:
+                wait = await run_in_threadpool(self.controller.rate_limit, user_id)
+            else:
+                wait = self.controller.rate_limit(user_id)
+            if wait:
+                limiter.counters["rate_limited"] += 1
+                await _reject(scope, receive, send, 429, "Too many requests", wait)
+                return
+
+        if not await limiter.acquire():
+            await _reject(scope, receive, send, 503, "Server busy, please retry", limiter.retry_after())
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+
+async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: float) -> None:
+    headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+    await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
@@ -1,8 +1,14 @@
 from fastapi import APIRouter
 
 from app.api.routes import admin, auth, quiz
+from app.core.config import get_settings
 
 api_router = APIRouter()
-api_router.include_router(auth.router, tags=["auth"])
-api_router.include_router(quiz.router, tags=["quiz"])
+if get_settings().db_async:
+    # Employee-facing routes switch to the async engine; admin routes stay on the sync one.
+    api_router.include_router(auth.async_router, tags=["auth"])
+    api_router.include_router(quiz.async_router, tags=["quiz"])
+else:
+    api_router.include_router(auth.router, tags=["auth"])
+    api_router.include_router(quiz.router, tags=["quiz"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -1,23 +1,64 @@
-import csv
-import io
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from fastapi.responses import StreamingResponse
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.api.deps import require_admin
-from app.db.session import get_db
-from app.models import Image, QuizSession, Setting, User
-from app.schemas import ImageCreate, ImageRead, SessionResult, SettingRead, SettingUpdate
+from app.core.admission import admission
+from app.core.security import token_cache
+from app.db.session import get_db, get_report_db
+from app.db.upsert import insert_on_conflict
+from app.models import Image, ImageType, PendingImageRelease, QuizReservation, Setting, User
+from app.schemas import (
+    ImageCreate,
+    ImageIngestSummary,
+    ImageRead,
+    ResultStats,
+    RosterImportSummary,
+    SessionResult,
+    SettingRead,
+    SettingUpdate,
+)
+from app.services.image_catalog import image_catalog
+from app.services.image_pool import image_pool
+from app.services.images import DEFAULT_IMAGE_PAGE_SIZE, MAX_IMAGE_PAGE_SIZE, ImageIngest, list_images_page
+from app.services.ingest import iter_records
+from app.services.quiz import invalidate_quiz_queue, leased_session_image_ids, quiz_queue
+from app.services.quiz_settings import settings_cache
+from app.services.reporting import report_freshness
+from app.services.result_stats import get_result_stats, record_retest_approvals
+from app.services.roster import RosterImport
+from app.services.results import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    ResultFilters,
+    iter_results_csv,
+    list_results_page,
+)
+from app.services.session_reaper import session_reaper
+from app.services.users import invalidate_users, revocation_watch, user_cache
 
 router = APIRouter()
 
 
+def _page_response(
+    rows: List[Dict[str, Any]], next_cursor: Union[str, int, None], headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    # Rows are already dicts in the response schema's shape; encoding them with
+    # orjson skips building and re-validating a model per row.
+    headers = dict(headers or {})
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return ORJSONResponse(rows, headers=headers or None)
+
+
 @router.get("/settings", response_model=SettingRead)
 def get_settings(admin: User = Depends(require_admin), db: Session = Depends(get_db)) -> SettingRead:  # noqa: ARG001
-    setting = db.query(Setting).first()
+    setting = settings_cache.get(db)
     if setting is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Settings not configured")
     return setting
@@ -33,116 +74,199 @@ def update_settings(
     if setting is None:
         setting = Setting()
         db.add(setting)
+    else:
+        setting.version = Setting.version + 1
     setting.passing_score = payload.passing_score
     setting.num_questions = payload.num_questions
     setting.num_options = payload.num_options
     db.commit()
     db.refresh(setting)
+    settings_cache.invalidate()
+    invalidate_quiz_queue(db)
     return setting
 
 
+@router.get("/images", response_model=List[ImageRead])
+def list_images(
+    image_type: Optional[ImageType] = Query(None, alias="type", description="Only images of this type"),
+    used_in_session: Optional[bool] = Query(None, description="Only images currently in (or out of) a quiz"),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value of the previous page"),
+    limit: int = Query(DEFAULT_IMAGE_PAGE_SIZE, ge=1, le=MAX_IMAGE_PAGE_SIZE),
+    admin: User = Depends(require_admin),  # noqa: ARG001
+    db: Session = Depends(get_db),
+) -> ORJSONResponse:
+    images, next_cursor = list_images_page(
+        db, image_type=image_type, used_in_session=used_in_session, cursor=cursor, limit=limit
+    )
+    return _page_response(images, next_cursor)
+
+
 @router.post("/images", response_model=List[ImageRead])
 def upload_images(
     images: List[ImageCreate],
     admin: User = Depends(require_admin),
     db: Session = Depends(get_db),
 ) -> List[ImageRead]:
-    stored_images: List[Image] = []
+    """Store new images and return them in request order.
+
+    URLs already stored, or repeated within the request, are skipped.
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
     for image in images:
-        stored = Image(file_url=str(image.file_url), type=image.type, uploaded_by=admin.id)
-        db.add(stored)
-        stored_images.append(stored)
+        file_url = str(image.file_url)
+        rows.setdefault(file_url, {"file_url": file_url, "type": image.type, "uploaded_by": admin.id})
+    if not rows:
+        return []
+    stored_images = db.scalars(
+        insert_on_conflict(db, Image)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=[Image.file_url])
+        .returning(Image)
+    ).all()
+    # Read the RETURNING values before commit expires them, instead of one refresh per row.
+    by_url = {image.file_url: ImageRead.from_orm(image) for image in stored_images}
     db.commit()
-    for image in stored_images:
-        db.refresh(image)
-    return stored_images
+    results = [by_url[file_url] for file_url in rows if file_url in by_url]
+    image_pool.add((image.id, image.type) for image in results)
+    return results
+
+
+@router.post("/images/bulk", response_model=ImageIngestSummary)
+async def ingest_images(
+    request: Request,
+    admin: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+) -> ImageIngestSummary:
+    """Ingest a streamed NDJSON or CSV body (fields ``file_url``, ``type``) in committed batches."""
+    ingest = ImageIngest(db, uploaded_by=admin.id)
+    async for line_number, record, error in iter_records(request):
+        if ingest.add(line_number, record, error):
+            await run_in_threadpool(ingest.flush)
+    await run_in_threadpool(ingest.flush)
+    return ingest.summary
 
 
 @router.post("/images/reset", status_code=status.HTTP_204_NO_CONTENT)
 def reset_image_usage(admin: User = Depends(require_admin), db: Session = Depends(get_db)) -> Response:  # noqa: ARG001
-    db.query(Image).update({Image.used_in_session: False})
+    """Return every image to the pool except those held by leased sessions.
+
+    Sessions in progress keep their images and can still be submitted, and
+    overdue ones are left to the reaper, which also gives back the retake
+    permission a retest used.
+    """
+    quiz_queue.drain()
+    db.execute(
+        update(Image)
+        .where(Image.used_in_session.is_(True), Image.id.not_in(leased_session_image_ids()))
+        .values(used_in_session=False)
+        .execution_options(synchronize_session=False)
+    )
+    # Queued releases would otherwise free images handed out again after the reset.
+    db.query(PendingImageRelease).delete()
+    # The reset freed the images of every worker's prepared quiz sets too; with
+    # their reservations gone, each worker drops those sets instead of serving them.
+    db.query(QuizReservation).delete()
     db.commit()
+    image_pool.load(db)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@router.post("/users/bulk", response_model=RosterImportSummary)
+async def import_roster(
+    request: Request,
+    admin: User = Depends(require_admin),  # noqa: ARG001
+    db: Session = Depends(get_db),
+) -> RosterImportSummary:
+    """Register employees from a streamed NDJSON or CSV body (fields ``employee_id``, ``name``).
+
+    Importing the roster before an exam turns every login into a single read.
+    """
+    roster = RosterImport(db)
+    async for line_number, record, error in iter_records(request):
+        if roster.add(line_number, record, error):
+            await run_in_threadpool(roster.flush)
+    await run_in_threadpool(roster.flush)
+    return roster.summary
+
+
+@router.get("/runtime")
+def runtime_stats(admin: User = Depends(require_admin)) -> dict[str, dict[str, int]]:  # noqa: ARG001
+    return {
+        "image_pool": image_pool.stats(),
+        "image_catalog": image_catalog.stats(),
+        "quiz_queue": quiz_queue.stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "revocation_watch": revocation_watch.stats(),
+        "session_reaper": session_reaper.stats(),
+        "admission": admission.stats(),
+        "reporting": report_freshness.stats(),
+    }
+
+
 @router.get("/results", response_model=List[SessionResult])
 def list_results(
     status_filter: Optional[str] = Query(None, description="Filter by pass/fail/retest"),
+    employee_id: Optional[str] = Query(None, description="Only sessions of this employee"),
+    date_from: Optional[datetime] = Query(None, description="Sessions created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Sessions created before this time"),
+    score_min: Optional[int] = Query(None, ge=0, le=100),
+    score_max: Optional[int] = Query(None, ge=0, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     admin: User = Depends(require_admin),  # noqa: ARG001
-    db: Session = Depends(get_db),
-) -> List[SessionResult]:
-    query = db.query(QuizSession, User).join(User, QuizSession.user_id == User.id)
-    if status_filter == "pass":
-        query = query.filter(QuizSession.passed.is_(True))
-    elif status_filter == "fail":
-        query = query.filter(QuizSession.passed.is_(False))
-    elif status_filter == "retest":
-        query = query.filter(QuizSession.is_retest.is_(True))
-
-    results = []
-    for session, user in query.order_by(QuizSession.created_at.desc()).all():
-        results.append(
-            SessionResult(
-                session_id=session.id,
-                employee_id=user.employee_id,
-                name=user.name,
-                score=session.score,
-                passed=session.passed,
-                created_at=session.created_at,
-                submitted_at=session.submitted_at,
-                is_retest=session.is_retest,
-            )
-        )
-    return results
+    db: Session = Depends(get_report_db),
+) -> ORJSONResponse:
+    headers = report_freshness.headers()
+    filters = ResultFilters(
+        status=status_filter,
+        employee_id=employee_id,
+        date_from=date_from,
+        date_to=date_to,
+        score_min=score_min,
+        score_max=score_max,
+    )
+    results, next_cursor = list_results_page(db, filters, cursor=cursor, limit=limit)
+    return _page_response(results, next_cursor, headers)
+
+
+@router.get("/results/stats", response_model=ResultStats)
+def results_stats(
+    response: Response,
+    days: int = Query(30, ge=1, le=366, description="Number of most recent days to tally"),
+    admin: User = Depends(require_admin),  # noqa: ARG001
+    db: Session = Depends(get_report_db),
+) -> ResultStats:
+    response.headers.update(report_freshness.headers())
+    return get_result_stats(db, days=days)
 
 
 @router.get("/results/csv")
 def export_results_csv(
+    gzip: bool = Query(False, description="Compress the export on the fly"),
     admin: User = Depends(require_admin),  # noqa: ARG001
-    db: Session = Depends(get_db),
 ) -> StreamingResponse:
-    sessions = (
-        db.query(QuizSession, User)
-        .join(User, QuizSession.user_id == User.id)
-        .order_by(QuizSession.created_at.desc())
-        .all()
-    )
-
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["사원번호", "이름", "점수", "합격여부", "응시일", "재시험여부"])
-    for session, user in sessions:
-        writer.writerow(
-            [
-                user.employee_id,
-                user.name,
-                session.score if session.score is not None else "",
-                "합격" if session.passed else "불합격",
-                session.created_at.isoformat(),
-                "Y" if session.is_retest else "N",
-            ]
-        )
-    buffer.seek(0)
-    headers = {"Content-Disposition": "attachment; filename=quiz_results.csv"}
-    return StreamingResponse(iter([buffer.getvalue()]), media_type="text/csv", headers=headers)
+    headers = report_freshness.headers()
+    if gzip:
+        headers["Content-Disposition"] = "attachment; filename=quiz_results.csv.gz"
+        return StreamingResponse(iter_results_csv(compress=True), media_type="application/gzip", headers=headers)
+    headers["Content-Disposition"] = "attachment; filename=quiz_results.csv"
+    return StreamingResponse(iter_results_csv(), media_type="text/csv", headers=headers)
 
 
 @router.post("/retest", status_code=status.HTTP_204_NO_CONTENT)
 def approve_retest(admin: User = Depends(require_admin), db: Session = Depends(get_db)) -> Response:  # noqa: ARG001
-    latest_sessions = (
-        db.query(QuizSession.user_id, func.max(QuizSession.id).label("latest_id"))
-        .filter(QuizSession.submitted_at.is_not(None))
-        .group_by(QuizSession.user_id)
-        .subquery()
-    )
-    failed_user_ids = (
-        db.query(QuizSession.user_id)
-        .join(latest_sessions, QuizSession.id == latest_sessions.c.latest_id)
-        .filter(QuizSession.passed.is_(False))
-        .all()
+    user_ids = list(
+        db.scalars(
+            update(User)
+            .where(User.latest_passed.is_(False), User.can_retake.is_(False))
+            .values(can_retake=True)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
     )
-    user_ids = [row[0] for row in failed_user_ids]
     if user_ids:
-        db.query(User).filter(User.id.in_(user_ids)).update({User.can_retake: True}, synchronize_session=False)
+        record_retest_approvals(db, len(user_ids))
         db.commit()
+        invalidate_users(user_ids)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
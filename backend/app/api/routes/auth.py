@@ -1,42 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.api.deps import get_current_user, get_current_user_async
 from app.core.config import get_settings
 from app.core.security import create_access_token
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
+from app.db.upsert import insert_on_conflict
 from app.models import QuizSession, Setting, User, UserRole
 from app.schemas import AdminLoginRequest, Token, UserLogin
+from app.services.quiz import open_session_clause
+from app.services.quiz_settings import settings_cache
+from app.services.users import invalidate_user, revoke_user_tokens
 
 router = APIRouter()
+async_router = APIRouter()
 settings = get_settings()
 
 
-@router.post("/login", response_model=Token)
-def login_user(payload: UserLogin, db: Session = Depends(get_db)) -> Token:
-    user = (
-        db.query(User)
-        .filter(User.employee_id == payload.employee_id, User.name == payload.name)
-        .one_or_none()
+def _find_login(db: Session, payload: UserLogin) -> Optional[Row]:
+    # One round trip for the account and its open-session check.
+    has_open_session = (
+        select(QuizSession.id)
+        .where(QuizSession.user_id == User.id, open_session_clause(datetime.utcnow()))
+        .exists()
+        .label("has_open_session")
     )
-    if user is None:
-        user = User(employee_id=payload.employee_id, name=payload.name, role=UserRole.USER)
-        db.add(user)
+    return db.execute(
+        select(User.id, User.role, has_open_session).where(
+            User.employee_id == payload.employee_id, User.name == payload.name
+        )
+    ).first()
+
+
+def _login_user(db: Session, payload: UserLogin) -> Token:
+    """Log an employee in, registering them on first login.
+
+    A known employee (for instance one pre-registered by a roster import) costs
+    a single read. An unknown one is inserted with ``ON CONFLICT DO NOTHING``
+    against the ``(employee_id, name)`` unique index, so concurrent first logins
+    share one account: the loser of the race reads the winner's row.
+    """
+    login = _find_login(db, payload)
+    if login is None:
+        user_id = db.scalar(
+            insert_on_conflict(db, User)
+            .values(employee_id=payload.employee_id, name=payload.name, role=UserRole.USER)
+            .on_conflict_do_nothing(index_elements=[User.employee_id, User.name])
+            .returning(User.id)
+        )
         db.commit()
-        db.refresh(user)
+        if user_id is not None:
+            token, expire = create_access_token({"user_id": user_id, "role": UserRole.USER})
+            return Token(access_token=token, expires_at=expire)
+        login = _find_login(db, payload)
+    # End the read transaction so the connection returns to the pool now. Left to the
+    # get_db teardown, which needs a threadpool worker of its own, a storm of logins
+    # can leave every worker waiting for connections that only teardowns release.
+    db.rollback()
 
-    active_session = (
-        db.query(QuizSession)
-        .filter(QuizSession.user_id == user.id, QuizSession.submitted_at.is_(None))
-        .first()
-    )
-    if active_session:
+    if login.has_open_session:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Active session exists")
 
-    token, expire = create_access_token({"user_id": user.id, "role": user.role})
+    token, expire = create_access_token({"user_id": login.id, "role": login.role})
     return Token(access_token=token, expires_at=expire)
 
 
+@router.post("/login", response_model=Token)
+def login_user(payload: UserLogin, db: Session = Depends(get_db)) -> Token:
+    return _login_user(db, payload)
+
+
+@async_router.post("/login", response_model=Token)
+async def login_user_async(payload: UserLogin, db: AsyncSession = Depends(get_async_db)) -> Token:
+    return await db.run_sync(_login_user, payload)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_user(user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> Response:
+    """Revoke every token issued to the caller so far."""
+    revoke_user_tokens(db, user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@async_router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_user_async(
+    user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+) -> Response:
+    """Revoke every token issued to the caller so far."""
+    await db.run_sync(revoke_user_tokens, user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/admin/login", response_model=Token)
+@async_router.post("/admin/login", response_model=Token)
 def admin_login(payload: AdminLoginRequest, db: Session = Depends(get_db)) -> Token:
     if payload.username != settings.admin_username or payload.password != settings.admin_password:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
@@ -47,8 +108,9 @@ def admin_login(payload: AdminLoginRequest, db: Session = Depends(get_db)) -> To
         db.add(admin_user)
         db.commit()
         db.refresh(admin_user)
+        invalidate_user(admin_user.id)
 
-    if not db.query(Setting).first():
+    if settings_cache.get(db) is None:
         setting = Setting(
             passing_score=settings.default_passing_score,
             num_questions=settings.default_num_questions,
@@ -1,40 +1,75 @@
 from datetime import datetime
+from typing import List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.api.deps import get_current_user, get_current_user_async
+from app.db.session import get_async_db, get_db
 from app.models import QuizSession, User
-from app.schemas import QuizRequest, QuizResult, QuizSubmission
-from app.services.quiz import evaluate_submission, generate_quiz_session, get_active_settings, release_images
+from app.schemas import CompactQuizRequest, QuizRequest, QuizResult, QuizSubmission
+from app.services.image_catalog import CatalogSnapshot, image_catalog
+from app.services.quiz import (
+    close_session,
+    evaluate_submission,
+    generate_quiz_session,
+    get_active_settings,
+    open_session_clause,
+    queue_image_release,
+)
+from app.services.result_stats import record_submission
+from app.services.users import invalidate_user
 
 router = APIRouter()
+async_router = APIRouter()
 
+CATALOG_IMMUTABLE = "private, max-age=31536000, immutable"
+CATALOG_REVALIDATE = "private, no-cache"
 
-@router.get("/quiz", response_model=QuizRequest)
-def request_quiz(user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> QuizRequest:
+
+def _request_quiz(db: Session, user: User) -> Tuple[int, List[dict]]:
     active_session = (
-        db.query(QuizSession)
-        .filter(QuizSession.user_id == user.id, QuizSession.submitted_at.is_(None))
+        db.query(QuizSession.id)
+        .filter(QuizSession.user_id == user.id, open_session_clause(datetime.utcnow()))
         .first()
     )
     if active_session:
+        # As in login: refusals end their read now rather than in the get_db teardown.
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Active session in progress")
 
-    latest_submitted = (
-        db.query(QuizSession)
-        .filter(QuizSession.user_id == user.id, QuizSession.submitted_at.is_not(None))
-        .order_by(QuizSession.created_at.desc())
-        .first()
-    )
-    if latest_submitted and not latest_submitted.passed and not user.can_retake:
+    # The user may come from the user cache; reread the retake state by primary key.
+    db.refresh(user, ["latest_passed", "can_retake"])
+    if user.latest_passed is False and not user.can_retake:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Retake not permitted")
 
     session, question_set = generate_quiz_session(db, user)
+    return session.id, question_set
 
+
+def _quiz_response(session_id: int, question_set: List[dict], compact: bool) -> Union[QuizRequest, JSONResponse]:
+    if compact:
+        image_ids = [[option["image_id"] for option in question["options"]] for question in question_set]
+        # Usually the loaded catalog already holds every drawn image; if not, this loads them.
+        catalog_version = image_catalog.covering(image_id for ids in image_ids for image_id in ids)
+        # Already plain ints and strings in the CompactQuizRequest shape, so response-model
+        # validation, most of the cost of the full response, is skipped.
+        return JSONResponse(
+            {
+                "session_id": session_id,
+                "catalog_version": catalog_version,
+                "questions": [
+                    {"question_id": question["question_id"], "image_ids": ids}
+                    for question, ids in zip(question_set, image_ids)
+                ],
+            }
+        )
     return QuizRequest(
-        session_id=session.id,
+        session_id=session_id,
         questions=[
             {
                 "question_id": question["question_id"],
@@ -45,27 +80,102 @@ def request_quiz(user: User = Depends(get_current_user), db: Session = Depends(g
     )
 
 
-@router.post("/quiz/submit", response_model=QuizResult)
-def submit_quiz(
-    payload: QuizSubmission,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> QuizResult:
+def _submit_quiz(db: Session, user: User, payload: QuizSubmission) -> QuizResult:
     session = db.query(QuizSession).filter(QuizSession.id == payload.session_id).first()
     if session is None or session.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     if session.submitted_at is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session already submitted")
+    now = datetime.utcnow()
+    if not close_session(db, session.id, now):
+        # The lease ran out; the reaper frees (or has freed) the session's images.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session expired")
 
     settings = get_active_settings(db)
-    score, passed, image_ids = evaluate_submission(session, [answer.dict() for answer in payload.answers], settings.passing_score)
+    answers = {answer.question_id: answer.selected_image_id for answer in payload.answers}
+    score, passed = evaluate_submission(db, session, answers, settings.passing_score)
 
     session.score = score
     session.passed = passed
-    session.submitted_at = datetime.utcnow()
+    session.submitted_at = now
     db.add(session)
+    user.latest_session_id = session.id
+    user.latest_passed = passed
+    record_submission(db, session)
+    # The images are freed by the background releaser, in its own transaction.
+    queue_image_release(db, session.id)
     db.commit()
-
-    release_images(db, image_ids)
+    invalidate_user(user.id)
 
     return QuizResult(session_id=session.id, score=score, passed=passed)
+
+
+def _catalog_response(request: Request, catalog: CatalogSnapshot, version: Optional[int]) -> Response:
+    # A versioned URL always resolves the ids it was issued for, since the catalog only grows.
+    headers = {"ETag": catalog.etag, "Cache-Control": CATALOG_REVALIDATE if version is None else CATALOG_IMMUTABLE}
+    tags = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if catalog.etag in tags or "*" in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(catalog.body, media_type="application/json", headers=headers)
+
+
+@router.get("/quiz", response_model=Union[QuizRequest, CompactQuizRequest])
+def request_quiz(
+    compact: bool = Query(False, description="Return image ids only; resolve them with /api/quiz/images"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Union[QuizRequest, JSONResponse]:
+    return _quiz_response(*_request_quiz(db, user), compact)
+
+
+@router.post("/quiz/submit", response_model=QuizResult)
+def submit_quiz(
+    payload: QuizSubmission,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> QuizResult:
+    return _submit_quiz(db, user, payload)
+
+
+@router.get("/quiz/images", response_class=Response)
+def get_image_catalog(
+    request: Request,
+    version: Optional[int] = Query(None, ge=0, description="catalog_version of a compact quiz"),
+    user: User = Depends(get_current_user),  # noqa: ARG001
+) -> Response:
+    """Map image ids to URLs, for clients of the compact quiz response."""
+    return _catalog_response(request, image_catalog.get(covering=version or 0), version)
+
+
+@async_router.get("/quiz", response_model=Union[QuizRequest, CompactQuizRequest])
+async def request_quiz_async(
+    compact: bool = Query(False, description="Return image ids only; resolve them with /api/quiz/images"),
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> Union[QuizRequest, JSONResponse]:
+    session_id, question_set = await db.run_sync(_request_quiz, user)
+    if compact:
+        # Resolving the image ids may read the catalog from the database, which blocks.
+        return await run_in_threadpool(_quiz_response, session_id, question_set, compact)
+    return _quiz_response(session_id, question_set, compact)
+
+
+@async_router.post("/quiz/submit", response_model=QuizResult)
+async def submit_quiz_async(
+    payload: QuizSubmission,
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> QuizResult:
+    return await db.run_sync(_submit_quiz, user, payload)
+
+
+@async_router.get("/quiz/images", response_class=Response)
+async def get_image_catalog_async(
+    request: Request,
+    version: Optional[int] = Query(None, ge=0, description="catalog_version of a compact quiz"),
+    user: User = Depends(get_current_user_async),  # noqa: ARG001
+) -> Response:
+    """Map image ids to URLs, for clients of the compact quiz response."""
+    catalog = await run_in_threadpool(image_catalog.get, version or 0)
+    return _catalog_response(request, catalog, version)
@@ -0,0 +1,82 @@
+"""Maintenance commands, run from the ``backend`` directory.
+
+    python -m app.cli migrate [--check]
+    python -m app.cli rebuild-stats [--check]
+    python -m app.cli archive-sessions [--older-than-days N] [--batch-size N] [--max-batches N]
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+
+from app.core.config import get_settings
+from app.db.migrations import LATEST_VERSION, migrate, require_current_schema, schema_version
+from app.db.session import SessionLocal
+from app.services.archive import archive_sessions
+from app.services.result_stats import rebuild_result_counters
+
+
+def run_migrations(args: argparse.Namespace) -> int:
+    version = schema_version()
+    if args.check:
+        pending = LATEST_VERSION - version
+        print(f"{pending} migration(s) pending" if pending > 0 else f"Schema is up to date (version {version})")
+        return 1 if pending > 0 else 0
+    for migration in migrate():
+        print(f"Applied {migration.version}: {migration.name}")
+    print(f"Schema is at version {schema_version()}")
+    return 0
+
+
+def rebuild_stats(args: argparse.Namespace) -> int:
+    require_current_schema()
+    db = SessionLocal()
+    try:
+        mismatches = rebuild_result_counters(db, check_only=args.check)
+    finally:
+        db.close()
+    for (metric, period), (stored, rebuilt) in sorted(mismatches.items()):
+        print(f"{metric}[{period or 'total'}]: stored={stored} rebuilt={rebuilt}")
+    if args.check:
+        print(f"{len(mismatches)} counter(s) out of date" if mismatches else "Result counters are consistent")
+        return 1 if mismatches else 0
+    print(f"Result counters rebuilt ({len(mismatches)} corrected)")
+    return 0
+
+
+def run_archive(args: argparse.Namespace) -> int:
+    require_current_schema()
+    cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+    archived = 0
+    for moved in archive_sessions(cutoff, args.batch_size, args.max_batches):
+        archived += moved
+        print(f"Archived {archived} session(s) created before {cutoff:%Y-%m-%d %H:%M}")
+    print(f"{archived} session(s) archived" if archived else "No sessions to archive")
+    return 0
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Quiz backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser("migrate", help="apply pending schema migrations")
+    upgrade.add_argument("--check", action="store_true", help="only report whether migrations are pending")
+    upgrade.set_defaults(handler=run_migrations)
+
+    rebuild = commands.add_parser("rebuild-stats", help="recompute the results summary from the stored sessions")
+    rebuild.add_argument("--check", action="store_true", help="only report counters that differ, change nothing")
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    archive = commands.add_parser("archive-sessions", help="move old finished sessions into the archive table")
+    archive.add_argument("--older-than-days", type=int, default=settings.archive_after_days)
+    archive.add_argument("--batch-size", type=int, default=settings.archive_batch_size, help="sessions per transaction")
+    archive.add_argument("--max-batches", type=int, default=None, help="stop after this many batches; rerun to resume")
+    archive.set_defaults(handler=run_archive)
+
+    args = parser.parse_args()
+    raise SystemExit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
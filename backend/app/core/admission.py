@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Protocol, Tuple
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import LATENCY_BUCKETS, Histogram
+
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class RouteLimiter:
+    """At most ``concurrency`` requests in flight (zero: unlimited), at most ``queue_size`` waiting.
+
+    Waiters are served in arrival order: a finishing request hands its slot to
+    the oldest waiter. A request that finds the queue full, or waits longer
+    than ``max_wait`` seconds, is shed. All methods run on the event loop.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self.wait = Histogram(LATENCY_BUCKETS)
+        # Smoothed seconds per admitted request, for the Retry-After estimate.
+        self.service_time = 0.0
+        self.counters: Counter = Counter()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; returns False if the request was shed instead."""
+        if self.active < self.concurrency or self.concurrency <= 0:
+            self.active += 1
+            self._admit(0.0)
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.counters["queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self.counters["timeout"] += 1
+            return False
+        except BaseException:
+            # Cancelled (the client went away); pass on a slot handed over meanwhile.
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        self._admit(time.perf_counter() - started)
+        return True
+
+    def release(self, duration: float) -> None:
+        if duration:
+            self.service_time += SERVICE_TIME_SMOOTHING * (duration - self.service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes straight to the waiter, so ``active`` is unchanged.
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least one."""
+        backlog = (len(self._waiters) + self.active) * self.service_time / self.concurrency
+        return max(1, math.ceil(backlog))
+
+    def _admit(self, waited: float) -> None:
+        self.counters["admitted"] += 1
+        self.wait.observe(waited)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.counters["admitted"],
+            "shed_queue_full": self.counters["queue_full"],
+            "shed_timeout": self.counters["timeout"],
+            "rate_limited": self.counters["rate_limited"],
+        }
+
+
+class BucketStore(Protocol):
+    # Whether ``take`` may block on I/O, and so must not run on the event loop.
+    blocking: bool
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        """Take one token from ``key``'s bucket; return 0, or the seconds until one is available."""
+
+
+class MemoryBucketStore:
+    """Token buckets of one worker process, least recently used ones dropped past ``maxsize``."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated_at) * rate)
+            granted = tokens >= 1
+            self._buckets[key] = (tokens - 1 if granted else tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return 0.0 if granted else (1 - tokens) / rate
+
+
+class SqliteBucketStore:
+    """Token buckets in a local SQLite file, shared by every worker on the host.
+
+    Each ``take`` is one atomic upsert that refills the bucket for the time
+    elapsed and takes a token if one is available. It waits at most
+    ``busy_timeout`` seconds for another worker's write; past that it raises
+    ``sqlite3.OperationalError``.
+    """
+
+    blocking = True
+
+    TAKE = """
+        INSERT INTO rate_buckets (key, tokens, updated_at, granted) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated_at) * :rate)
+                - (min(:burst, tokens + (:now - updated_at) * :rate) >= 1),
+            granted = min(:burst, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now
+        RETURNING tokens, granted
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.05) -> None:
+        self._connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=wal")
+        # Buckets are throwaway state; losing the last updates in a crash is harmless.
+        self._connection.execute("PRAGMA synchronous=off")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, granted INTEGER NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, now: float) -> float:
+        with self._lock:
+            tokens, granted = self._connection.execute(
+                self.TAKE, {"key": key, "rate": rate, "burst": burst, "now": now}
+            ).fetchone()
+        return 0.0 if granted else (1 - tokens) / rate
+
+
+class AdmissionController:
+    """Route limiters keyed by ``(method, path)`` plus an optional per-user rate limit."""
+
+    def __init__(
+        self,
+        limiters: Dict[Tuple[str, str], RouteLimiter],
+        store: Optional[BucketStore] = None,
+        rate: float = 0.0,
+        burst: int = 1,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.limiters = limiters
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.unchecked = 0
+        self._lock = threading.Lock()
+
+    def rate_limit(self, user_id: int) -> float:
+        """Charge one request to ``user_id``; return 0, or the seconds the user must wait.
+
+        A shared store that stays locked past its timeout lets the request
+        through unchecked rather than failing it; those are counted.
+        """
+        if self.store is None or self.rate <= 0:
+            return 0.0
+        try:
+            return self.store.take(str(user_id), self.rate, self.burst, self.clock())
+        except sqlite3.OperationalError:
+            with self._lock:
+                self.unchecked += 1
+            return 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **{
+                f"{limiter.name}_{key}": value
+                for limiter in self.limiters.values()
+                for key, value in limiter.stats().items()
+            },
+            "rate_limit_unchecked": self.unchecked,
+        }
+
+    def render(self) -> List[str]:
+        """Prometheus lines for the metrics endpoint."""
+        limiters = sorted(self.limiters.values(), key=lambda limiter: limiter.name)
+        lines = [
+            "# HELP quiz_admission_in_flight Requests holding an admission slot.",
+            "# TYPE quiz_admission_in_flight gauge",
+            *(f'quiz_admission_in_flight{{route="{limiter.name}"}} {limiter.active}' for limiter in limiters),
+            "# HELP quiz_admission_queue_depth Requests waiting for an admission slot.",
+            "# TYPE quiz_admission_queue_depth gauge",
+            *(f'quiz_admission_queue_depth{{route="{limiter.name}"}} {limiter.depth}' for limiter in limiters),
+            "# HELP quiz_admission_shed_total Requests turned away, by reason.",
+            "# TYPE quiz_admission_shed_total counter",
+        ]
+        for limiter in limiters:
+            for reason in ("queue_full", "timeout", "rate_limited"):
+                lines.append(f'quiz_admission_shed_total{{route="{limiter.name}",reason="{reason}"}} {limiter.counters[reason]}')
+        lines += [
+            "# HELP quiz_admission_rate_limit_unchecked_total Requests let past a locked rate limit store.",
+            "# TYPE quiz_admission_rate_limit_unchecked_total counter",
+            f"quiz_admission_rate_limit_unchecked_total {self.unchecked}",
+        ]
+        name = "quiz_admission_wait_seconds"
+        lines += [f"# HELP {name} Time admitted requests waited for a slot.", f"# TYPE {name} histogram"]
+        for limiter in limiters:
+            labels = f'route="{limiter.name}"'
+            lines += [f'{name}_bucket{{{labels},le="{le}"}} {count}' for le, count in limiter.wait.samples()]
+            lines.append(f"{name}_sum{{{labels}}} {limiter.wait.sum:g}")
+            lines.append(f"{name}_count{{{labels}}} {limiter.wait.count}")
+        return lines
+
+
+def build_admission(config: Settings) -> AdmissionController:
+    """Guard quiz generation and submission, the routes that write under bursts.
+
+    Concurrency limits apply per worker process, matching its threadpool and
+    connection pool; a limit of zero only counts requests. Rate limits
+    apply per user across both routes, and across workers when
+    ``ADMISSION_STORE_PATH`` names a shared bucket file.
+    """
+    limiters = {
+        route: RouteLimiter(name, concurrency, queue_size, config.admission_max_wait)
+        for route, name, concurrency, queue_size in (
+            (("GET", "/api/quiz"), "quiz", config.admission_quiz_concurrency, config.admission_quiz_queue),
+            (("POST", "/api/quiz/submit"), "submit", config.admission_submit_concurrency, config.admission_submit_queue),
+        )
+    }
+    store: Optional[BucketStore] = None
+    if config.user_rate_limit > 0:
+        if config.admission_store_path:
+            store = SqliteBucketStore(config.admission_store_path, config.admission_store_timeout)
+        else:
+            store = MemoryBucketStore()
+    return AdmissionController(limiters, store, rate=config.user_rate_limit, burst=config.user_rate_burst)
+
+
+admission = build_admission(get_settings())
@@ -7,11 +7,54 @@ class Settings(BaseSettings):
     secret_key: str = Field("super-secret-key", env="SECRET_KEY")
     access_token_expire_minutes: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     database_url: str = Field("sqlite:///./quiz.db", env="DATABASE_URL")
+    db_async: bool = Field(False, env="DB_ASYNC")
+    db_profile: str = Field("auto", env="DB_PROFILE")
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(30, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    report_database_url: str = Field("", env="REPORT_DATABASE_URL")
+    report_pool_size: int = Field(4, env="REPORT_POOL_SIZE")
+    report_heartbeat_interval: float = Field(1.0, env="REPORT_HEARTBEAT_INTERVAL")
+    sqlite_journal_mode: str = Field("wal", env="SQLITE_JOURNAL_MODE")
+    sqlite_synchronous: str = Field("normal", env="SQLITE_SYNCHRONOUS")
+    sqlite_busy_timeout_ms: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_cache_size_kib: int = Field(65536, env="SQLITE_CACHE_SIZE_KIB")
+    sqlite_mmap_size: int = Field(268435456, env="SQLITE_MMAP_SIZE")
     admin_username: str = Field("admin", env="ADMIN_USERNAME")
     admin_password: str = Field("admin123", env="ADMIN_PASSWORD")
     default_passing_score: int = Field(70, env="DEFAULT_PASSING_SCORE")
     default_num_questions: int = Field(10, env="DEFAULT_NUM_QUESTIONS")
     default_num_options: int = Field(10, env="DEFAULT_NUM_OPTIONS")
+    quiz_queue_size: int = Field(0, env="QUIZ_QUEUE_SIZE")
+    quiz_queue_fill_interval: float = Field(1.0, env="QUIZ_QUEUE_FILL_INTERVAL")
+    quiz_queue_lease_seconds: float = Field(300.0, env="QUIZ_QUEUE_LEASE_SECONDS")
+    token_cache_size: int = Field(10000, env="TOKEN_CACHE_SIZE")
+    user_cache_size: int = Field(10000, env="USER_CACHE_SIZE")
+    user_cache_ttl: float = Field(30.0, env="USER_CACHE_TTL")
+    token_revocation_check_interval: float = Field(1.0, env="TOKEN_REVOCATION_CHECK_INTERVAL")
+    settings_check_interval: float = Field(1.0, env="SETTINGS_CHECK_INTERVAL")
+    image_release_interval: float = Field(0.5, env="IMAGE_RELEASE_INTERVAL")
+    image_release_batch_size: int = Field(500, env="IMAGE_RELEASE_BATCH_SIZE")
+    session_lease_minutes: int = Field(90, env="SESSION_LEASE_MINUTES")
+    session_reap_interval: float = Field(60.0, env="SESSION_REAP_INTERVAL")
+    session_reap_batch_size: int = Field(500, env="SESSION_REAP_BATCH_SIZE")
+    archive_after_days: int = Field(180, env="ARCHIVE_AFTER_DAYS")
+    archive_batch_size: int = Field(500, env="ARCHIVE_BATCH_SIZE")
+    image_catalog_check_interval: float = Field(5.0, env="IMAGE_CATALOG_CHECK_INTERVAL")
+    gzip_minimum_size: int = Field(1024, env="GZIP_MINIMUM_SIZE")
+    gzip_compresslevel: int = Field(6, env="GZIP_COMPRESSLEVEL")
+    admission_quiz_concurrency: int = Field(8, env="ADMISSION_QUIZ_CONCURRENCY")
+    admission_quiz_queue: int = Field(64, env="ADMISSION_QUIZ_QUEUE")
+    admission_submit_concurrency: int = Field(16, env="ADMISSION_SUBMIT_CONCURRENCY")
+    admission_submit_queue: int = Field(128, env="ADMISSION_SUBMIT_QUEUE")
+    admission_max_wait: float = Field(5.0, env="ADMISSION_MAX_WAIT")
+    admission_store_path: str = Field("", env="ADMISSION_STORE_PATH")
+    admission_store_timeout: float = Field(0.05, env="ADMISSION_STORE_TIMEOUT")
+    user_rate_limit: float = Field(2.0, env="USER_RATE_LIMIT")
+    user_rate_burst: int = Field(10, env="USER_RATE_BURST")
+    metrics_enabled: bool = Field(False, env="METRICS_ENABLED")
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> Iterator[Tuple[str, float]]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{bound:g}", cumulative
+        yield "+Inf", self.count
+
+
+@dataclass
+class RequestStats:
+    """Database work attributed to the request currently being served."""
+
+    statements: int = 0
+    db_seconds: float = 0.0
+    statement_started: float = 0.0
+
+
+@dataclass
+class RouteMetrics:
+    latency: Histogram
+    statements: Histogram
+    db_seconds: float = 0.0
+
+
+# Set by the metrics middleware for the duration of a request. Worker threads
+# and greenlets serving the request inherit it; background workers do not.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsRegistry:
+    """Per-route request and database metrics, rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._responses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], List[str]]] = []
+        self.in_progress = 0
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Append the lines ``collector`` returns to every rendering."""
+        self._collectors.append(collector)
+
+    def start_request(self) -> Token:
+        """Start attributing SQL statements to a new request; returns the token for ``finish_request``."""
+        with self._lock:
+            self.in_progress += 1
+        return _request_stats.set(RequestStats())
+
+    def finish_request(self, token: Token, method: str, route: str, status_code: int, duration: float) -> None:
+        stats = _request_stats.get()
+        _request_stats.reset(token)
+        with self._lock:
+            self.in_progress -= 1
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics(
+                    latency=Histogram(LATENCY_BUCKETS), statements=Histogram(STATEMENT_BUCKETS)
+                )
+            metrics.latency.observe(duration)
+            metrics.statements.observe(stats.statements)
+            metrics.db_seconds += stats.db_seconds
+            self._responses[(method, route, status_code)] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = [
+                "# HELP quiz_http_requests_in_progress Requests currently being served.",
+                "# TYPE quiz_http_requests_in_progress gauge",
+                f"quiz_http_requests_in_progress {self.in_progress}",
+                "# HELP quiz_http_requests_total Responses sent, by route and status code.",
+                "# TYPE quiz_http_requests_total counter",
+            ]
+            for (method, route, status_code), count in sorted(self._responses.items()):
+                lines.append(f'quiz_http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+            routes = sorted(self._routes.items())
+            for name, help_text, attribute in (
+                ("quiz_http_request_duration_seconds", "Request latency, including streamed bodies.", "latency"),
+                ("quiz_db_statements_per_request", "SQL statements executed per request.", "statements"),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (method, route), metrics in routes:
+                    histogram: Histogram = getattr(metrics, attribute)
+                    labels = f'method="{method}",route="{route}"'
+                    lines += [f'{name}_bucket{{{labels},le="{le}"}} {count}' for le, count in histogram.samples()]
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+            lines += [
+                "# HELP quiz_db_seconds_total Time spent executing SQL statements, by route.",
+                "# TYPE quiz_db_seconds_total counter",
+            ]
+            for (method, route), metrics in routes:
+                lines.append(f'quiz_db_seconds_total{{method="{method}",route="{route}"}} {metrics.db_seconds:g}')
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ARG001
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statement_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ARG001
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - stats.statement_started
+
+
+def install_sql_hooks() -> None:
+    """Attribute every SQL statement, on any engine, to the request that issued it."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,27 +1,68 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import jwt
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# Claims of tokens whose signature has been checked, keyed by the token's SHA-256
+# digest and kept until the token expires. Entries are shared; callers must not
+# modify the claims they get back.
+token_cache: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.access_token_expire_minutes * 60
+)
+
 
 def create_access_token(data: Dict[str, Any], expires_minutes: int | None = None) -> tuple[str, datetime]:
     expire_delta = timedelta(minutes=expires_minutes or settings.access_token_expire_minutes)
     expire = datetime.now(tz=timezone.utc) + expire_delta
-    payload = {"exp": expire, **data}
+    # A fractional ``iat`` lets revocation tell apart tokens issued within the same second.
+    payload = {"exp": expire, "iat": time.time(), **data}
     encoded_jwt = jwt.encode(payload, settings.secret_key, algorithm="HS256")
     return encoded_jwt, expire
 
 
+def _verified_claims(token: str) -> Dict[str, Any]:
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        lifetime = claims.get("exp", 0) - time.time()
+        if lifetime > 0:
+            token_cache.set(key, claims, ttl=lifetime)
+    return claims
+
+
 def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verify ``token`` and return its claims, from the token cache when it was seen before."""
     try:
-        decoded = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        return _verified_claims(token)
     except jwt.ExpiredSignatureError as exc:  # pragma: no cover - runtime guard
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired") from exc
     except jwt.InvalidTokenError as exc:  # pragma: no cover - runtime guard
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
-    return decoded
+
+
+def token_user_id(token: str) -> Optional[int]:
+    """Return the ``user_id`` of a valid token, or None; for callers that must not raise."""
+    try:
+        return _verified_claims(token).get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def token_revoked(claims: Dict[str, Any], revoked_before: Optional[datetime]) -> bool:
+    """Whether ``claims`` belong to a token issued before its user's tokens were revoked.
+
+    ``revoked_before`` is the user's ``tokens_valid_after`` (naive UTC). Tokens
+    from before ``iat`` was issued count as revoked once a revocation exists.
+    """
+    if revoked_before is None:
+        return False
+    return claims.get("iat", 0) <= revoked_before.replace(tzinfo=timezone.utc).timestamp()
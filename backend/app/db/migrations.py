@@ -0,0 +1,609 @@
+"""Versioned schema migrations, applied once per deployment with ``python -m app.cli migrate``.
+
+Application workers never change the schema; they only check at startup that
+every migration below has been applied. Steps never import models or
+services: each works on its own table definitions, frozen as they were when
+the step was written, so replaying them gives the same schema whatever the
+code looks like now.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator, List
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    and_,
+    case,
+    column,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from app.core.config import get_settings
+from app.db.session import engine
+
+QUESTION_BACKFILL_BATCH_SIZE = 500
+MIGRATION_LOCK_KEY = 7_240_315
+
+# The schema as of version 1, when migrations were introduced.
+baseline = MetaData()
+users = Table(
+    "users",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("employee_id", String, nullable=False, index=True),
+    Column("name", String, nullable=False, index=True),
+    Column("role", Enum("USER", "ADMIN", name="userrole"), nullable=False),
+    Column("can_retake", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("latest_session_id", Integer, nullable=True),
+    Column("latest_passed", Boolean, nullable=True),
+    Index("ix_users_employee_id_name", "employee_id", "name", unique=True),
+    Index("ix_users_latest_passed_can_retake", "latest_passed", "can_retake"),
+)
+images = Table(
+    "images",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("file_url", String, nullable=False, index=True),
+    Column("type", Enum("CORRECT", "INCORRECT", name="imagetype"), nullable=False),
+    Column("used_in_session", Boolean, nullable=False),
+    Column("uploaded_by", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime, nullable=False),
+)
+settings_table = Table(
+    "settings",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("passing_score", Integer, nullable=False),
+    Column("num_questions", Integer, nullable=False),
+    Column("num_options", Integer, nullable=False),
+    Column("version", Integer, nullable=False, server_default="1"),
+)
+quiz_sessions = Table(
+    "quiz_sessions",
+    baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("score", Integer, nullable=True),
+    Column("passed", Boolean, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("is_retest", Boolean, nullable=False),
+    Column("submitted_at", DateTime, nullable=True),
+    Index("ix_quiz_sessions_created_at_id", "created_at", "id"),
+    Index("ix_quiz_sessions_passed_created_at_id", "passed", "created_at", "id"),
+    Index("ix_quiz_sessions_is_retest_created_at_id", "is_retest", "created_at", "id"),
+    Index("ix_quiz_sessions_user_id_created_at_id", "user_id", "created_at", "id"),
+    Index("ix_quiz_sessions_score_created_at", "score", "created_at"),
+    Index("ix_quiz_sessions_user_id_submitted_at", "user_id", "submitted_at"),
+)
+quiz_questions = Table(
+    "quiz_questions",
+    baseline,
+    Column("id", Integer, primary_key=True),
+    Column("session_id", Integer, ForeignKey("quiz_sessions.id"), nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("public_id", String(36), nullable=False),
+    Column("answer_image_id", Integer, ForeignKey("images.id"), nullable=False),
+    Column("selected_image_id", Integer, ForeignKey("images.id"), nullable=True),
+    Index("ix_quiz_questions_session_id_public_id", "session_id", "public_id", unique=True),
+)
+quiz_question_options = Table(
+    "quiz_question_options",
+    baseline,
+    Column("id", Integer, primary_key=True),
+    Column("question_id", Integer, ForeignKey("quiz_questions.id"), nullable=False, index=True),
+    Column("position", Integer, nullable=False),
+    Column("image_id", Integer, ForeignKey("images.id"), nullable=False),
+)
+pending_image_releases = Table(
+    "pending_image_releases",
+    baseline,
+    Column("id", Integer, primary_key=True),
+    Column("session_id", Integer, ForeignKey("quiz_sessions.id"), nullable=False, unique=True),
+    Column("created_at", DateTime, nullable=False),
+)
+result_counters = Table(
+    "result_counters",
+    baseline,
+    Column("metric", String(32), primary_key=True),
+    Column("period", String(10), primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+
+def _column_names(connection: Connection, table_name: str) -> set:
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+
+def _add_column(connection: Connection, table_name: str, new_column: Column) -> None:
+    if new_column.name not in _column_names(connection, table_name):
+        ddl = CreateColumn(new_column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+
+
+def _create_baseline() -> None:
+    """Create the version 1 tables, or bring a database from before versioning up to them.
+
+    Such databases were kept current by creating missing tables and adding
+    missing columns on every start; tables they already have are only given
+    the columns they lack here, and their indexes are left to step 4.
+    """
+    with engine.begin() as connection:
+        baseline.create_all(bind=connection)
+        for baseline_table in baseline.sorted_tables:
+            for baseline_column in baseline_table.columns:
+                _add_column(connection, baseline_table.name, baseline_column)
+
+
+def _migrate_question_sets() -> None:
+    """Move question sets stored as JSON on quiz_sessions into the question tables.
+
+    Sessions are copied in id order, one batch at a time, and the legacy column
+    is dropped in the same transaction so a failed run leaves the data untouched.
+    """
+    legacy = table("quiz_sessions", column("id", Integer), column("question_set", JSON))
+    with engine.begin() as connection:
+        if "question_set" not in _column_names(connection, "quiz_sessions"):
+            return
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(legacy.c.id, legacy.c.question_set)
+                .where(legacy.c.id > last_id)
+                .order_by(legacy.c.id)
+                .limit(QUESTION_BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            questions = [
+                (session_id, position, question)
+                for session_id, question_set in rows
+                for position, question in enumerate(question_set or [])
+            ]
+            if questions:
+                question_ids = connection.scalars(
+                    insert(quiz_questions).returning(quiz_questions.c.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "session_id": session_id,
+                            "position": position,
+                            "public_id": question["question_id"],
+                            "answer_image_id": question["answer_id"],
+                        }
+                        for session_id, position, question in questions
+                    ],
+                ).all()
+                connection.execute(
+                    insert(quiz_question_options),
+                    [
+                        {"question_id": question_id, "position": position, "image_id": option["image_id"]}
+                        for question_id, (_, _, question) in zip(question_ids, questions)
+                        for position, option in enumerate(question["options"])
+                    ],
+                )
+            last_id = rows[-1].id
+        connection.execute(text("ALTER TABLE quiz_sessions DROP COLUMN question_set"))
+
+
+def _merge_duplicate_users() -> None:
+    """Fold users sharing an ``(employee_id, name)`` into the oldest one.
+
+    Concurrent first logins could create such copies before the unique index
+    existed, and the index cannot be built while they remain. The copies'
+    sessions and uploads move to the kept user, who may retake if any copy
+    could; its latest-session pointer is cleared for ``_backfill_latest_sessions``.
+    """
+    with engine.begin() as connection:
+        if "ix_users_employee_id_name" in {index["name"] for index in inspect(connection).get_indexes("users")}:
+            return
+        groups = (
+            select(users.c.employee_id, users.c.name, func.min(users.c.id).label("keeper_id"))
+            .group_by(users.c.employee_id, users.c.name)
+            .having(func.count() > 1)
+            .subquery()
+        )
+        keeper_of = dict(
+            connection.execute(
+                select(users.c.id, groups.c.keeper_id)
+                .join(groups, and_(users.c.employee_id == groups.c.employee_id, users.c.name == groups.c.name))
+                .where(users.c.id != groups.c.keeper_id)
+            ).all()
+        )
+        if not keeper_of:
+            return
+        duplicate_ids = list(keeper_of)
+        keeper_ids = set(keeper_of.values())
+        retaking_copies = connection.scalars(
+            select(users.c.id).where(users.c.id.in_(duplicate_ids), users.c.can_retake.is_(True))
+        )
+        retakers = {keeper_of[user_id] for user_id in retaking_copies}
+        connection.execute(
+            update(quiz_sessions)
+            .where(quiz_sessions.c.user_id.in_(duplicate_ids))
+            .values(user_id=case(keeper_of, value=quiz_sessions.c.user_id))
+        )
+        connection.execute(
+            update(images)
+            .where(images.c.uploaded_by.in_(duplicate_ids))
+            .values(uploaded_by=case(keeper_of, value=images.c.uploaded_by))
+        )
+        if retakers:
+            connection.execute(update(users).where(users.c.id.in_(retakers)).values(can_retake=True))
+        connection.execute(
+            update(users).where(users.c.id.in_(keeper_ids)).values(latest_session_id=None, latest_passed=None)
+        )
+        connection.execute(delete(users).where(users.c.id.in_(duplicate_ids)))
+
+
+def _backfill_latest_sessions() -> None:
+    # Users who submitted before the latest-session pointer existed have it unset.
+    with engine.begin() as connection:
+        stale = connection.scalar(
+            select(quiz_sessions.c.id)
+            .join(users, quiz_sessions.c.user_id == users.c.id)
+            .where(quiz_sessions.c.submitted_at.is_not(None), users.c.latest_session_id.is_(None))
+            .limit(1)
+        )
+        if stale is None:
+            return
+        latest = (
+            select(quiz_sessions.c.id)
+            .where(quiz_sessions.c.user_id == users.c.id, quiz_sessions.c.submitted_at.is_not(None))
+            .order_by(quiz_sessions.c.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        connection.execute(update(users).where(users.c.latest_session_id.is_(None)).values(latest_session_id=latest))
+        latest_passed = (
+            select(quiz_sessions.c.passed).where(quiz_sessions.c.id == users.c.latest_session_id).scalar_subquery()
+        )
+        connection.execute(
+            update(users).where(users.c.latest_session_id.is_not(None)).values(latest_passed=latest_passed)
+        )
+
+
+def _seed_result_counters() -> None:
+    """Count the sessions submitted before the results summary existed into an empty counter table.
+
+    The counters are those of version 5: per-day and all-time ``submitted``,
+    ``passed``/``failed`` and ``retest_sessions``, an all-time ``score_total``
+    and all-time ``score_<n>`` buckets ten points wide, 90-100 being the last.
+    """
+    with engine.begin() as connection:
+        if connection.scalar(select(result_counters.c.metric).limit(1)) is not None:
+            return
+        submitted_day = func.date(quiz_sessions.c.submitted_at)
+        rows = connection.execute(
+            select(quiz_sessions.c.passed, quiz_sessions.c.is_retest, quiz_sessions.c.score, submitted_day, func.count())
+            .where(quiz_sessions.c.submitted_at.is_not(None))
+            .group_by(quiz_sessions.c.passed, quiz_sessions.c.is_retest, quiz_sessions.c.score, submitted_day)
+        )
+        counters: Counter = Counter()
+        for passed, is_retest, score, day, sessions in rows:
+            day = day.isoformat() if isinstance(day, date) else day
+            score = score or 0
+            for metric in ("submitted", "passed" if passed else "failed") + (("retest_sessions",) if is_retest else ()):
+                counters[(metric, "")] += sessions
+                counters[(metric, day)] += sessions
+            counters[("score_total", "")] += score * sessions
+            counters[(f"score_{min(score // 10 * 10, 90)}", "")] += sessions
+        if counters:
+            connection.execute(
+                insert(result_counters),
+                [{"metric": metric, "period": period, "value": value} for (metric, period), value in counters.items()],
+            )
+
+
+def _create_indexes() -> None:
+    with engine.begin() as connection:
+        for baseline_table in baseline.sorted_tables:
+            for index in baseline_table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def _seed_default_settings() -> None:
+    settings = get_settings()
+    with engine.begin() as connection:
+        if connection.scalar(select(settings_table.c.id).limit(1)) is None:
+            connection.execute(
+                insert(settings_table).values(
+                    passing_score=settings.default_passing_score,
+                    num_questions=settings.default_num_questions,
+                    num_options=settings.default_num_options,
+                    version=1,
+                )
+            )
+
+
+def _lease_open_sessions() -> None:
+    """Add session leases and give sessions left open a full lease from now.
+
+    Open sessions used to block their user until an admin reset; with a lease
+    the reaper expires them if they are still open once it runs out.
+    """
+    leased = table(
+        "quiz_sessions",
+        column("submitted_at", DateTime),
+        column("expires_at", DateTime),
+        column("expired_at", DateTime),
+    )
+    lease_until = datetime.utcnow() + timedelta(minutes=get_settings().session_lease_minutes)
+    with engine.begin() as connection:
+        _add_column(connection, "quiz_sessions", Column("expires_at", DateTime, nullable=True))
+        _add_column(connection, "quiz_sessions", Column("expired_at", DateTime, nullable=True))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_quiz_sessions_expires_at ON quiz_sessions (expires_at)"))
+        connection.execute(
+            update(leased)
+            .where(leased.c.submitted_at.is_(None), leased.c.expired_at.is_(None), leased.c.expires_at.is_(None))
+            .values(expires_at=lease_until)
+        )
+
+
+def _add_token_revocation() -> None:
+    with engine.begin() as connection:
+        _add_column(connection, "users", Column("tokens_valid_after", DateTime, nullable=True))
+
+
+def _create_session_archive() -> None:
+    Table(
+        "quiz_sessions_archive",
+        MetaData(),
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("user_id", Integer, nullable=False),
+        Column("score", Integer, nullable=True),
+        Column("passed", Boolean, nullable=False),
+        Column("is_retest", Boolean, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("submitted_at", DateTime, nullable=False),
+        Column("archived_at", DateTime, nullable=False),
+        Column("question_set", LargeBinary, nullable=False),
+        Index("ix_quiz_sessions_archive_created_at_id", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_passed_created_at_id", "passed", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_is_retest_created_at_id", "is_retest", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+    ).create(bind=engine, checkfirst=True)
+
+
+def _create_replica_heartbeat() -> None:
+    Table(
+        "replica_heartbeat",
+        MetaData(),
+        Column("id", Integer, primary_key=True, autoincrement=False),
+        Column("beat_at", DateTime, nullable=False),
+    ).create(bind=engine, checkfirst=True)
+
+
+def _archive_expired_sessions() -> None:
+    """Let the session archive hold sessions the reaper expired.
+
+    Adds ``expired_at`` and drops NOT NULL from ``submitted_at``. SQLite
+    cannot relax a column in place, so there the table is rebuilt: the copy,
+    the swap and the new indexes commit together, and the table that
+    receives the copy is dropped first in case an earlier run was
+    interrupted.
+    """
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            _add_column(connection, "quiz_sessions_archive", Column("expired_at", DateTime, nullable=True))
+            connection.execute(text("ALTER TABLE quiz_sessions_archive ALTER COLUMN submitted_at DROP NOT NULL"))
+            return
+        if "expired_at" in _column_names(connection, "quiz_sessions_archive"):
+            return
+
+        def archive_table(name: str, *indexes: Index) -> Table:
+            return Table(
+                name,
+                MetaData(),
+                Column("id", Integer, primary_key=True, autoincrement=False),
+                Column("user_id", Integer, nullable=False),
+                Column("score", Integer, nullable=True),
+                Column("passed", Boolean, nullable=False),
+                Column("is_retest", Boolean, nullable=False),
+                Column("created_at", DateTime, nullable=False),
+                Column("submitted_at", DateTime, nullable=True),
+                Column("expired_at", DateTime, nullable=True),
+                Column("archived_at", DateTime, nullable=False),
+                Column("question_set", LargeBinary, nullable=False),
+                *indexes,
+            )
+
+        copied = "id, user_id, score, passed, is_retest, created_at, submitted_at, archived_at, question_set"
+        connection.execute(text("DROP TABLE IF EXISTS quiz_sessions_archive_v12"))
+        archive_table("quiz_sessions_archive_v12").create(bind=connection)
+        connection.execute(
+            text(f"INSERT INTO quiz_sessions_archive_v12 ({copied}) SELECT {copied} FROM quiz_sessions_archive")
+        )
+        connection.execute(text("DROP TABLE quiz_sessions_archive"))
+        connection.execute(text("ALTER TABLE quiz_sessions_archive_v12 RENAME TO quiz_sessions_archive"))
+        archive = archive_table(
+            "quiz_sessions_archive",
+            Index("ix_quiz_sessions_archive_created_at_id", "created_at", "id"),
+            Index("ix_quiz_sessions_archive_passed_created_at_id", "passed", "created_at", "id"),
+            Index("ix_quiz_sessions_archive_is_retest_created_at_id", "is_retest", "created_at", "id"),
+            Index("ix_quiz_sessions_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+        )
+        for index in archive.indexes:
+            index.create(bind=connection)
+
+
+def _index_token_revocations() -> None:
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_users_tokens_valid_after ON users (tokens_valid_after)"))
+
+
+def _create_quiz_reservations() -> None:
+    Table(
+        "quiz_reservations",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("image_ids", JSON, nullable=False),
+        Column("expires_at", DateTime, nullable=False, index=True),
+    ).create(bind=engine, checkfirst=True)
+
+
+def _merge_duplicate_images() -> None:
+    """Fold images sharing a ``file_url`` into the oldest one and make the URL unique.
+
+    Concurrent uploads could store the same URL twice while ingest checked for
+    it before inserting. Questions pointing at a copy move to the kept image,
+    which counts as used if any copy was. Archived sessions keep the copies' ids.
+    """
+    with engine.begin() as connection:
+        if any(
+            index["name"] == "ix_images_file_url" and index["unique"]
+            for index in inspect(connection).get_indexes("images")
+        ):
+            return
+        groups = (
+            select(images.c.file_url, func.min(images.c.id).label("keeper_id"))
+            .group_by(images.c.file_url)
+            .having(func.count() > 1)
+            .subquery()
+        )
+        keeper_of = dict(
+            connection.execute(
+                select(images.c.id, groups.c.keeper_id)
+                .join(groups, images.c.file_url == groups.c.file_url)
+                .where(images.c.id != groups.c.keeper_id)
+            ).all()
+        )
+        if keeper_of:
+            duplicate_ids = list(keeper_of)
+            used_copies = connection.scalars(
+                select(images.c.id).where(images.c.id.in_(duplicate_ids), images.c.used_in_session.is_(True))
+            )
+            used_keepers = {keeper_of[image_id] for image_id in used_copies}
+            for table_, image_column in (
+                (quiz_questions, quiz_questions.c.answer_image_id),
+                (quiz_questions, quiz_questions.c.selected_image_id),
+                (quiz_question_options, quiz_question_options.c.image_id),
+            ):
+                connection.execute(
+                    update(table_)
+                    .where(image_column.in_(duplicate_ids))
+                    .values({image_column.name: case(keeper_of, value=image_column)})
+                )
+            if used_keepers:
+                connection.execute(update(images).where(images.c.id.in_(used_keepers)).values(used_in_session=True))
+            connection.execute(delete(images).where(images.c.id.in_(duplicate_ids)))
+        connection.execute(text("DROP INDEX IF EXISTS ix_images_file_url"))
+        connection.execute(text("CREATE UNIQUE INDEX ix_images_file_url ON images (file_url)"))
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[], None]
+
+
+# Append new steps with the next version; never edit or reorder applied ones.
+# Steps 2-7 are the checks that used to run on every application start. Each is
+# a no-op on a database that does not need it, so databases created before
+# versioning are brought up to date by applying them all.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables and missing columns", _create_baseline),
+    Migration(2, "move question sets into the question tables", _migrate_question_sets),
+    Migration(3, "merge duplicate users", _merge_duplicate_users),
+    Migration(4, "create missing indexes", _create_indexes),
+    Migration(5, "seed result counters", _seed_result_counters),
+    Migration(6, "backfill latest sessions", _backfill_latest_sessions),
+    Migration(7, "seed default quiz settings", _seed_default_settings),
+    Migration(8, "lease open quiz sessions", _lease_open_sessions),
+    Migration(9, "add token revocation to users", _add_token_revocation),
+    Migration(10, "create the session archive", _create_session_archive),
+    Migration(11, "create the replica heartbeat", _create_replica_heartbeat),
+    Migration(12, "archive expired sessions", _archive_expired_sessions),
+    Migration(13, "index token revocations", _index_token_revocations),
+    Migration(14, "create quiz queue reservations", _create_quiz_reservations),
+    Migration(15, "merge duplicate images", _merge_duplicate_images),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def schema_version() -> int:
+    """Return the highest applied migration, or 0 for an unversioned database."""
+    if not inspect(engine).has_table(schema_migrations.name):
+        return 0
+    with engine.connect() as connection:
+        return connection.scalar(select(func.max(schema_migrations.c.version))) or 0
+
+
+def require_current_schema() -> None:
+    version = schema_version()
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version} of {LATEST_VERSION}; run `python -m app.cli migrate` first"
+        )
+
+
+@contextmanager
+def _migration_lock() -> Iterator[None]:
+    # Keeps concurrent `migrate` runs against a shared server apart; SQLite
+    # deployments run it once, before starting the workers.
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def migrate() -> List[Migration]:
+    """Apply pending migrations in version order and return the ones applied.
+
+    Each step records its version once it has finished, so an interrupted run
+    resumes from the step that failed.
+    """
+    _metadata.create_all(bind=engine)
+    applied: List[Migration] = []
+    with _migration_lock():
+        current = schema_version()
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            migration.apply()
+            with engine.begin() as connection:
+                connection.execute(
+                    insert(schema_migrations).values(
+                        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                    )
+                )
+            applied.append(migration)
+    return applied
@@ -1,13 +1,165 @@
-from sqlalchemy import create_engine
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.db.upsert import UPSERT_DIALECTS
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+# RETURNING, which claims, releases and upserts rely on, arrived in SQLite 3.35.
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+@dataclass
+class EngineProfile:
+    name: str
+    engine_options: Dict[str, Any]
+    pragmas: Dict[str, Any] = field(default_factory=dict)
+    async_engine_options: Dict[str, Any] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        options = {**self.engine_options, **self.pragmas}
+        options.pop("connect_args", None)
+        return f"{self.name} ({', '.join(f'{key}={value}' for key, value in options.items())})"
+
+
+def build_engine_profile(config: Settings) -> EngineProfile:
+    """Pick engine options for the configured database.
+
+    ``sqlite`` runs in WAL mode so exam writers do not block admin readers, and
+    applies the tuning pragmas on every new connection. ``server`` targets a
+    networked database (e.g. PostgreSQL) with a sized, health-checked pool.
+    ``auto`` chooses by the DATABASE_URL backend. Only SQLite and PostgreSQL
+    are accepted: logins, submits and the counters depend on their upserts,
+    and SQLite only from the version that added RETURNING.
+    """
+    url = make_url(config.database_url)
+    if url.get_backend_name() not in UPSERT_DIALECTS:
+        raise ValueError(
+            f"Unsupported database {url.get_backend_name()!r} in DATABASE_URL; expected {' or '.join(UPSERT_DIALECTS)}"
+        )
+    if url.get_backend_name() == "sqlite" and sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise ValueError(
+            f"SQLite {sqlite3.sqlite_version} is too old; "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or later is required for RETURNING"
+        )
+    name = config.db_profile
+    if name == "auto":
+        name = "sqlite" if url.get_backend_name() == "sqlite" else "server"
+
+    if name == "sqlite":
+        options: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+        in_memory = url.database in (None, "", ":memory:")
+        async_options: Dict[str, Any] = {}
+        if not in_memory:
+            options.update(pool_size=config.db_pool_size, max_overflow=config.db_max_overflow)
+            # aiosqlite defaults to NullPool, which would re-run the pragmas on every checkout.
+            async_options["poolclass"] = AsyncAdaptedQueuePool
+        pragmas = {
+            "journal_mode": config.sqlite_journal_mode,
+            "synchronous": config.sqlite_synchronous,
+            "busy_timeout": config.sqlite_busy_timeout_ms,
+            "cache_size": -config.sqlite_cache_size_kib,
+            "mmap_size": config.sqlite_mmap_size,
+        }
+        if in_memory:
+            pragmas.pop("journal_mode")
+        return EngineProfile(name, options, pragmas, async_options)
+
+    if name == "server":
+        return EngineProfile(
+            name,
+            {
+                "pool_size": config.db_pool_size,
+                "max_overflow": config.db_max_overflow,
+                "pool_timeout": config.db_pool_timeout,
+                "pool_pre_ping": config.db_pool_pre_ping,
+                "pool_recycle": config.db_pool_recycle,
+            },
+        )
+
+    raise ValueError(f"Unknown DB_PROFILE {config.db_profile!r}; expected auto, sqlite or server")
+
+
+def _install_pragmas(sync_engine: Engine, pragmas: Dict[str, Any]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+
+def build_report_engine(config: Settings, primary: Engine) -> Engine:
+    """Engine for admin reporting, so long reads never hold connections exam requests need.
+
+    Reports read ``REPORT_DATABASE_URL`` (a replica) when it is set, and the
+    primary database otherwise, always through a pool of their own with at
+    most ``REPORT_POOL_SIZE`` connections. On SQLite those connections are
+    WAL readers opened with ``query_only``: each report reads a snapshot and
+    never takes a write lock. ``REPORT_POOL_SIZE=0``, or an in-memory
+    database, shares the primary engine instead.
+    """
+    url = config.report_database_url or config.database_url
+    if config.report_pool_size <= 0 or make_url(url).database in (None, "", ":memory:"):
+        return primary
+    profile = build_engine_profile(config.copy(update={"database_url": url}))
+    options = dict(profile.engine_options)
+    if "pool_size" in options:
+        options.update(pool_size=config.report_pool_size, max_overflow=0)
+    report_engine = create_engine(url, **options)
+    pragmas = dict(profile.pragmas)
+    if profile.name == "sqlite":
+        pragmas["query_only"] = "on"
+    _install_pragmas(report_engine, pragmas)
+    return report_engine
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+engine_profile = build_engine_profile(settings)
+
+engine = create_engine(settings.database_url, **engine_profile.engine_options)
+_install_pragmas(engine, engine_profile.pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+report_engine = build_report_engine(settings, engine)
+ReportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=report_engine)
+
+# The async engine is only built in async mode; the sync engine above keeps serving
+# admin routes and background workers either way.
+async_engine = (
+    create_async_engine(
+        async_database_url(settings.database_url),
+        **engine_profile.engine_options,
+        **engine_profile.async_engine_options,
+    )
+    if settings.db_async
+    else None
+)
+if async_engine is not None:
+    _install_pragmas(async_engine.sync_engine, engine_profile.pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if async_engine is not None else None
+
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +167,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_report_db():
+    db = ReportSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Dialects with an ``ON CONFLICT`` upsert; build_engine_profile rejects any other database at startup.
+UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def insert_on_conflict(db: Session, entity):
+    """Return an INSERT for ``entity`` that supports ``on_conflict_do_update``/``_do_nothing``.
+
+    Both supported databases (SQLite and PostgreSQL) share the same
+    ``ON CONFLICT`` syntax.
+    """
+    return UPSERT_DIALECTS[db.get_bind().dialect.name](entity)
@@ -1,14 +1,88 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.api.deps import require_admin
+from app.api.middleware import AdmissionMiddleware, MetricsMiddleware
 from app.api.routes import api_router
+from app.core.admission import admission
 from app.core.config import get_settings
-from app.db.base import init_db
+from app.core.metrics import CONTENT_TYPE, install_sql_hooks, metrics
+from app.db.migrations import require_current_schema
+from app.db.session import SessionLocal, async_engine, engine, engine_profile, report_engine
+from app.services.background import PeriodicWorker
+from app.services.image_catalog import image_catalog
+from app.services.image_pool import warm_image_pool
+from app.services.quiz import fill_quiz_queue, invalidate_quiz_queue, release_pending_images
+from app.services.quiz_settings import settings_cache
+from app.services.reporting import write_heartbeat
+from app.services.session_reaper import session_reaper
 
 settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
+
+background_workers = [
+    PeriodicWorker("image-releaser", settings.image_release_interval, release_pending_images),
+    PeriodicWorker("session-reaper", settings.session_reap_interval, session_reaper.sweep),
+    PeriodicWorker("image-catalog", settings.image_catalog_check_interval, image_catalog.refresh),
+]
+if settings.quiz_queue_size > 0:
+    background_workers.append(PeriodicWorker("quiz-queue-filler", settings.quiz_queue_fill_interval, fill_quiz_queue))
+if settings.report_database_url:
+    # Lets admin reports tell how far the replica they read trails the primary.
+    background_workers.append(PeriodicWorker("replica-heartbeat", settings.report_heartbeat_interval, write_heartbeat))
+
+
+def warm_caches() -> None:
+    logger.info("Database profile: %s%s", engine_profile.describe(), " [async]" if settings.db_async else "")
+    if report_engine is not engine:
+        logger.info("Admin reports read %s", report_engine.url.render_as_string(hide_password=True))
+    # The schema belongs to `python -m app.cli migrate`; workers only check it is current.
+    require_current_schema()
+    db = SessionLocal()
+    try:
+        settings_cache.get(db)
+    finally:
+        db.close()
+    image_catalog.refresh()
+    warm_image_pool()
+    # The releaser's first run frees images queued before the last shutdown.
+    for worker in background_workers:
+        worker.start()
+
+
+def stop_background_workers() -> None:
+    for worker in reversed(background_workers):
+        worker.stop()
+    release_pending_images()
+    db = SessionLocal()
+    try:
+        invalidate_quiz_queue(db)
+    finally:
+        db.close()
 
-app = FastAPI(title=settings.app_name)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:  # noqa: ARG001
+    warm_caches()
+    try:
+        yield
+    finally:
+        stop_background_workers()
+        # Pooled aiosqlite connections run on non-daemon threads and would keep the process alive.
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+
+# Innermost, so shed responses still pass through CORS and metrics.
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -16,10 +90,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.gzip_compresslevel > 0:
+    app.add_middleware(
+        GZipMiddleware, minimum_size=settings.gzip_minimum_size, compresslevel=settings.gzip_compresslevel
+    )
 
-init_db()
 app.include_router(api_router, prefix="/api")
 
+if settings.metrics_enabled:
+    # Registered only when enabled, so a disabled deployment pays nothing per request.
+    install_sql_hooks()
+    metrics.add_collector(admission.render)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_admin)])
+    def prometheus_metrics() -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
 
 @app.get("/health")
 def health_check() -> dict[str, str]:
@@ -1,14 +1,27 @@
+from app.models.archived_session import ArchivedSession
 from app.models.base import Base
 from app.models.image import Image, ImageType
+from app.models.image_release import PendingImageRelease
+from app.models.quiz_question import QuizQuestion, QuizQuestionOption
+from app.models.quiz_reservation import QuizReservation
 from app.models.quiz_session import QuizSession
+from app.models.replica_heartbeat import ReplicaHeartbeat
+from app.models.result_counter import ResultCounter
 from app.models.setting import Setting
 from app.models.user import User, UserRole
 
 __all__ = [
+    "ArchivedSession",
     "Base",
     "Image",
     "ImageType",
+    "PendingImageRelease",
+    "QuizQuestion",
+    "QuizQuestionOption",
+    "QuizReservation",
     "QuizSession",
+    "ReplicaHeartbeat",
+    "ResultCounter",
     "Setting",
     "User",
     "UserRole",
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, LargeBinary
+
+from app.models.base import Base
+
+
+class ArchivedSession(Base):
+    """A finished quiz session, submitted or expired, moved out of quiz_sessions by the archive job.
+
+    Keeps the session's id and outcome; its questions and the selected answers
+    are packed into ``question_set`` (see ``app.services.archive``).
+    """
+
+    __tablename__ = "quiz_sessions_archive"
+    __table_args__ = (
+        # The admin results filters, as on quiz_sessions.
+        Index("ix_quiz_sessions_archive_created_at_id", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_passed_created_at_id", "passed", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_is_retest_created_at_id", "is_retest", "created_at", "id"),
+        Index("ix_quiz_sessions_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+    # The id the session had in quiz_sessions.
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    score = Column(Integer, nullable=True)
+    passed = Column(Boolean, nullable=False)
+    is_retest = Column(Boolean, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    submitted_at = Column(DateTime, nullable=True)
+    expired_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    question_set = Column(LargeBinary, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ArchivedSession {self.id} user={self.user_id} score={self.score}>"
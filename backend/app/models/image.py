@@ -18,7 +18,7 @@ class Image(Base):
     __tablename__ = "images"
 
     id = Column(Integer, primary_key=True, index=True)
-    file_url = Column(String, nullable=False)
+    file_url = Column(String, nullable=False, unique=True, index=True)
     type = Column(Enum(ImageType), nullable=False)
     used_in_session = Column(Boolean, default=False, nullable=False)
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.models.base import Base
+
+
+class PendingImageRelease(Base):
+    """A submitted session whose images have not been returned to the pool yet.
+
+    Rows are written in the same transaction as the submission and removed in
+    the same transaction that frees the images, so no image can be left marked
+    as used by a session that has already finished.
+    """
+
+    __tablename__ = "pending_image_releases"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("quiz_sessions.id"), nullable=False, unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<PendingImageRelease session={self.session_id}>"
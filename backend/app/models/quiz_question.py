@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+
+from app.models.base import Base
+
+
+class QuizQuestion(Base):
+    __tablename__ = "quiz_questions"
+    __table_args__ = (
+        # Scoring and answer recording address questions by their public id within a session.
+        Index("ix_quiz_questions_session_id_public_id", "session_id", "public_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("quiz_sessions.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    public_id = Column(String(36), nullable=False)
+    answer_image_id = Column(Integer, ForeignKey("images.id"), nullable=False)
+    selected_image_id = Column(Integer, ForeignKey("images.id"), nullable=True)
+
+    options = relationship(
+        "QuizQuestionOption",
+        order_by="QuizQuestionOption.position",
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self) -> str:
+        return f"<QuizQuestion {self.public_id} session={self.session_id}>"
+
+
+class QuizQuestionOption(Base):
+    __tablename__ = "quiz_question_options"
+
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("quiz_questions.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    image_id = Column(Integer, ForeignKey("images.id"), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<QuizQuestionOption image={self.image_id} question={self.question_id}>"
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from sqlalchemy import JSON, Column, DateTime, Integer
+
+from app.models.base import Base
+
+
+class QuizReservation(Base):
+    """Images claimed for a prepared question set that no session owns yet.
+
+    A worker's quiz queue holds one per prepared set and renews its lease while
+    the set waits. Serving the set deletes the row in the transaction that
+    creates the session; a row whose lease runs out, because its worker died or
+    an admin reset the images, is deleted by the reaper, which frees its images.
+    Exactly one of them deletes each row, so the images are freed at most once.
+    """
+
+    __tablename__ = "quiz_reservations"
+
+    id = Column(Integer, primary_key=True)
+    image_ids = Column(JSON, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<QuizReservation {self.id} images={len(self.image_ids)}>"
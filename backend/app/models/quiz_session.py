@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -10,17 +10,36 @@ from app.models.base import Base
 
 class QuizSession(Base):
     __tablename__ = "quiz_sessions"
+    __table_args__ = (
+        # Keyset pagination of admin results, newest first, optionally narrowed by outcome or user.
+        Index("ix_quiz_sessions_created_at_id", "created_at", "id"),
+        Index("ix_quiz_sessions_passed_created_at_id", "passed", "created_at", "id"),
+        Index("ix_quiz_sessions_is_retest_created_at_id", "is_retest", "created_at", "id"),
+        Index("ix_quiz_sessions_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_quiz_sessions_score_created_at", "score", "created_at"),
+        # Open-session checks and latest-session lookups per user.
+        Index("ix_quiz_sessions_user_id_submitted_at", "user_id", "submitted_at"),
+        # Reaper sweeps; only open sessions carry a lease, so a sweep reads just the overdue ones.
+        Index("ix_quiz_sessions_expires_at", "expires_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    question_set = Column(JSON, nullable=False)
     score = Column(Integer, nullable=True)
     passed = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_retest = Column(Boolean, default=False, nullable=False)
     submitted_at = Column(DateTime, nullable=True)
+    # Lease of an open session; cleared when it is submitted or expired by the reaper.
+    expires_at = Column(DateTime, nullable=True)
+    expired_at = Column(DateTime, nullable=True)
 
     user = relationship("User")
+    questions = relationship(
+        "QuizQuestion",
+        order_by="QuizQuestion.position",
+        cascade="all, delete-orphan",
+    )
 
     def __repr__(self) -> str:
         return f"<QuizSession {self.id} user={self.user_id} score={self.score}>"
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Integer
+
+from app.models.base import Base
+
+
+class ReplicaHeartbeat(Base):
+    """A single row the workers keep touching on the primary database.
+
+    A replica's copy of ``beat_at`` tells how far behind the primary it is.
+    """
+
+    __tablename__ = "replica_heartbeat"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    beat_at = Column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ReplicaHeartbeat {self.beat_at}>"
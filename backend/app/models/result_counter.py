@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer, String
+
+from app.models.base import Base
+
+
+class ResultCounter(Base):
+    """Running tally behind the results summary.
+
+    ``period`` is an ISO date for per-day counters and empty for all-time totals.
+    """
+
+    __tablename__ = "result_counters"
+
+    metric = Column(String(32), primary_key=True)
+    period = Column(String(10), primary_key=True, default="")
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<ResultCounter {self.metric}[{self.period}]={self.value}>"
@@ -12,3 +12,5 @@ class Setting(Base):
     passing_score = Column(Integer, nullable=False, default=70)
     num_questions = Column(Integer, nullable=False, default=10)
     num_options = Column(Integer, nullable=False, default=10)
+    # Bumped on every update so each worker's settings cache can detect changes cheaply.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
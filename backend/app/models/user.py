@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum as PyEnum
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Enum, Index, Integer, String
 
 from app.models.base import Base
 
@@ -15,6 +15,14 @@ class UserRole(str, PyEnum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # One account per employee: concurrent first logins upsert against this index.
+        Index("ix_users_employee_id_name", "employee_id", "name", unique=True),
+        # Retest approval flips every user whose latest submission failed and who may not retake yet.
+        Index("ix_users_latest_passed_can_retake", "latest_passed", "can_retake"),
+        # Workers poll for cutoffs newer than the last one they saw to evict revoked users from their caches.
+        Index("ix_users_tokens_valid_after", "tokens_valid_after"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(String, nullable=False, index=True)
@@ -22,6 +30,11 @@ class User(Base):
     role = Column(Enum(UserRole), default=UserRole.USER, nullable=False)
     can_retake = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Outcome of the most recent submitted session, kept up to date on submit.
+    latest_session_id = Column(Integer, nullable=True)
+    latest_passed = Column(Boolean, nullable=True)
+    # Tokens issued up to this time are rejected: set on logout, or to cut off a changed account.
+    tokens_valid_after = Column(DateTime, nullable=True)
 
     def __repr__(self) -> str:
         return f"<User {self.employee_id} ({self.name})>"
@@ -1,24 +1,41 @@
 from app.schemas.auth import AdminLoginRequest, Token
-from app.schemas.image import ImageCreate, ImageRead
-from app.schemas.quiz import QuizAnswer, QuizOption, QuizQuestion, QuizRequest, QuizResult, QuizSubmission
-from app.schemas.result import SessionResult
+from app.schemas.image import ImageCreate, ImageIngestSummary, ImageRead
+from app.schemas.quiz import (
+    CompactQuizQuestion,
+    CompactQuizRequest,
+    QuizAnswer,
+    QuizOption,
+    QuizQuestion,
+    QuizRequest,
+    QuizResult,
+    QuizSubmission,
+)
+from app.schemas.result import DailyResultStats, ResultStats, ScoreBucket, SessionResult
 from app.schemas.setting import SettingRead, SettingUpdate
-from app.schemas.user import UserCreate, UserLogin, UserRead
+from app.schemas.user import RosterImportSummary, UserBase, UserCreate, UserLogin, UserRead
 
 __all__ = [
     "AdminLoginRequest",
     "Token",
     "ImageCreate",
+    "ImageIngestSummary",
     "ImageRead",
+    "CompactQuizQuestion",
+    "CompactQuizRequest",
     "QuizAnswer",
     "QuizOption",
     "QuizQuestion",
     "QuizRequest",
     "QuizResult",
     "QuizSubmission",
+    "DailyResultStats",
+    "ResultStats",
+    "ScoreBucket",
     "SessionResult",
     "SettingRead",
     "SettingUpdate",
+    "RosterImportSummary",
+    "UserBase",
     "UserCreate",
     "UserLogin",
     "UserRead",
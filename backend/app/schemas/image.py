@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, HttpUrl
 
@@ -20,3 +20,12 @@ class ImageRead(ImageBase):
 
     class Config:
         orm_mode = True
+
+
+class ImageIngestSummary(BaseModel):
+    inserted: int = 0
+    skipped_duplicates: int = 0
+    rejected: int = 0
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+    errors: List[str] = []
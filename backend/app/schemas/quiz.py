@@ -20,6 +20,17 @@ class QuizRequest(BaseModel):
     questions: List[QuizQuestion]
 
 
+class CompactQuizQuestion(BaseModel):
+    question_id: str
+    image_ids: List[int]
+
+
+class CompactQuizRequest(BaseModel):
+    session_id: int = Field(..., description="Quiz session identifier")
+    catalog_version: int = Field(..., description="Image catalog version that resolves every image id in this quiz")
+    questions: List[CompactQuizQuestion]
+
+
 class QuizSubmission(BaseModel):
     session_id: int
     answers: List["QuizAnswer"]
@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import List
 
 from pydantic import BaseModel
 
@@ -11,7 +12,35 @@ class SessionResult(BaseModel):
     passed: bool
     created_at: datetime
     submitted_at: datetime | None
+    expired_at: datetime | None
     is_retest: bool
 
     class Config:
         orm_mode = True
+
+
+class ScoreBucket(BaseModel):
+    min_score: int
+    max_score: int
+    sessions: int = 0
+
+
+class DailyResultStats(BaseModel):
+    day: date
+    submitted: int = 0
+    passed: int = 0
+    failed: int = 0
+    retest_sessions: int = 0
+    retests_approved: int = 0
+
+
+class ResultStats(BaseModel):
+    submitted: int = 0
+    passed: int = 0
+    failed: int = 0
+    retest_sessions: int = 0
+    retests_approved: int = 0
+    pass_rate: float | None = None
+    mean_score: float | None = None
+    score_histogram: List[ScoreBucket]
+    daily: List[DailyResultStats]
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, constr
 
 from app.models.user import UserRole
@@ -23,3 +25,10 @@ class UserRead(UserBase):
 
     class Config:
         orm_mode = True
+
+
+class RosterImportSummary(BaseModel):
+    inserted: int = 0
+    skipped_existing: int = 0
+    rejected: int = 0
+    errors: List[str] = []
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import delete, exists, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models import ArchivedSession, PendingImageRelease, QuizQuestion, QuizQuestionOption, QuizSession
+
+ARCHIVE_COLUMNS = (
+    QuizSession.id,
+    QuizSession.user_id,
+    QuizSession.score,
+    QuizSession.passed,
+    QuizSession.is_retest,
+    QuizSession.created_at,
+    QuizSession.submitted_at,
+    QuizSession.expired_at,
+)
+
+
+def pack_question_set(questions: List[dict]) -> bytes:
+    """Compress a session's questions, as read by ``_load_question_sets``, for the archive."""
+    rows = [
+        [question["question_id"], question["answer_id"], question["selected_id"], question["option_ids"]]
+        for question in questions
+    ]
+    return zlib.compress(orjson.dumps(rows))
+
+
+def unpack_question_set(blob: bytes) -> List[dict]:
+    """Questions of an archived session in position order, with the image the employee selected."""
+    return [
+        {"question_id": question_id, "answer_id": answer_id, "selected_id": selected_id, "option_ids": option_ids}
+        for question_id, answer_id, selected_id, option_ids in orjson.loads(zlib.decompress(blob))
+    ]
+
+
+def _load_question_sets(db: Session, session_ids: List[int]) -> Dict[int, List[dict]]:
+    # Options are the bulk of the rows: read them as bare (question, image) pairs on
+    # the connection, skipping ORM result processing, and attach them in Python.
+    question_ids = select(QuizQuestion.id).where(QuizQuestion.session_id.in_(session_ids))
+    option_ids: Dict[int, List[int]] = {}
+    for question_id, image_id in db.connection().execute(
+        select(QuizQuestionOption.question_id, QuizQuestionOption.image_id)
+        .where(QuizQuestionOption.question_id.in_(question_ids))
+        .order_by(QuizQuestionOption.question_id, QuizQuestionOption.position)
+    ).tuples():
+        option_ids.setdefault(question_id, []).append(image_id)
+
+    question_sets: Dict[int, List[dict]] = {session_id: [] for session_id in session_ids}
+    questions = db.execute(
+        select(
+            QuizQuestion.id,
+            QuizQuestion.session_id,
+            QuizQuestion.public_id,
+            QuizQuestion.answer_image_id,
+            QuizQuestion.selected_image_id,
+        )
+        .where(QuizQuestion.session_id.in_(session_ids))
+        .order_by(QuizQuestion.session_id, QuizQuestion.position)
+    )
+    for question_id, session_id, public_id, answer_id, selected_id in questions:
+        question_sets[session_id].append(
+            {
+                "question_id": public_id,
+                "answer_id": answer_id,
+                "selected_id": selected_id,
+                "option_ids": option_ids.get(question_id, []),
+            }
+        )
+    return question_sets
+
+
+def _archivable_session_ids(db: Session, cutoff: datetime, batch_size: int) -> List[int]:
+    return list(
+        db.scalars(
+            select(QuizSession.id)
+            .where(
+                QuizSession.created_at < cutoff,
+                or_(QuizSession.submitted_at.is_not(None), QuizSession.expired_at.is_not(None)),
+                # Images are freed through the session's questions, so wait for the releaser.
+                ~exists().where(PendingImageRelease.session_id == QuizSession.id),
+                # SQLite hands out the largest remaining rowid + 1, so keeping the newest
+                # session hot stops archived ids from being reused.
+                QuizSession.id < select(func.max(QuizSession.id)).scalar_subquery(),
+            )
+            .order_by(QuizSession.created_at, QuizSession.id)
+            .limit(batch_size)
+        )
+    )
+
+
+def _remove_sessions(db: Session, session_ids: List[int]) -> list:
+    """Delete the sessions with their questions and return their archive columns."""
+    question_ids = select(QuizQuestion.id).where(QuizQuestion.session_id.in_(session_ids))
+    db.execute(
+        delete(QuizQuestionOption)
+        .where(QuizQuestionOption.question_id.in_(question_ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(QuizQuestion).where(QuizQuestion.session_id.in_(session_ids)).execution_options(synchronize_session=False)
+    )
+    return db.execute(
+        delete(QuizSession)
+        .where(QuizSession.id.in_(session_ids))
+        .returning(*ARCHIVE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def archive_sessions(cutoff: datetime, batch_size: int, max_batches: Optional[int] = None) -> Iterator[int]:
+    """Move finished sessions created before ``cutoff`` into the archive table.
+
+    A session is finished once submitted, or once the reaper has expired it
+    and returned its images; sessions still open are left alone.
+
+    Sessions are moved oldest first, ``batch_size`` per transaction: a batch
+    copies the sessions' outcome and packed questions into the archive and
+    deletes them from the hot tables before committing. Progress is simply
+    what has left quiz_sessions, so an interrupted run resumes where it
+    stopped. Yields the number of sessions moved by each batch.
+    """
+    db = SessionLocal()
+    try:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            session_ids = _archivable_session_ids(db, cutoff, batch_size)
+            if not session_ids:
+                return
+            question_sets = _load_question_sets(db, session_ids)
+            sessions = _remove_sessions(db, session_ids)
+            if sessions:
+                now = datetime.utcnow()
+                db.execute(
+                    insert(ArchivedSession),
+                    [
+                        {
+                            **session._asdict(),
+                            "archived_at": now,
+                            "question_set": pack_question_set(question_sets[session.id]),
+                        }
+                        for session in sessions
+                    ],
+                )
+                db.commit()
+            batches += 1
+            yield len(sessions)
+            if len(session_ids) < batch_size:
+                return
+    finally:
+        db.close()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import or_, select
+
+from app.db.session import SessionLocal
+from app.models import Image
+
+# How long a gap in the image ids is rechecked for a row committed out of order;
+# after that the ids are taken to belong to rolled-back inserts.
+GAP_TTL = 600.0
+# Gaps rechecked per refresh, newest first; older ones are given up early.
+MAX_GAPS = 256
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Image id -> URL mapping at one version, with its JSON body prebuilt.
+
+    Only URLs are published: the image type is the answer key.
+    """
+
+    version: int
+    urls: Dict[int, str]
+    body: bytes
+
+    @property
+    def etag(self) -> str:
+        # Weak, because the compression middleware may re-encode the body.
+        return f'W/"images-{self.version}"'
+
+
+class ImageCatalog:
+    """In-process copy of the image catalog served to quiz clients.
+
+    Images are never updated or deleted through the API, only appended, so a
+    catalog holding every committed image has grown past every earlier one and
+    its size identifies it across workers: the version is the number of images.
+    Ids are not committed in order on a server database, so besides the images
+    past the highest id loaded, each refresh rechecks the gaps below it for up
+    to GAP_TTL seconds; a late image found there bumps the version like any
+    other. The ``image-catalog`` worker calls ``refresh`` every
+    IMAGE_CATALOG_CHECK_INTERVAL seconds. ``get`` and ``covering`` read the
+    database only when asked for a version or an id the catalog lacks; one
+    caller then loads while the others wait for its snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._current: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._max_id = 0
+        # (first id, last id, monotonic time noticed) of id ranges not seen yet.
+        self._gaps: List[Tuple[int, int, float]] = []
+        self._counters = {"loads": 0, "waits": 0, "late_images": 0, "fetched_images": 0}
+
+    @property
+    def version(self) -> int:
+        current = self._current
+        return current.version if current is not None else 0
+
+    def get(self, covering: int = 0) -> CatalogSnapshot:
+        current = self._current
+        if current is not None and current.version >= covering:
+            return current
+        with self._lock:
+            current = self._current
+            if current is not None and current.version >= covering:
+                self._counters["waits"] += 1
+                return current
+            return self._refresh()
+
+    def covering(self, image_ids: Iterable[int]) -> int:
+        """Return the version of a catalog that resolves every id in ``image_ids``.
+
+        Ids missing after a refresh, committed too late for their gap to be
+        rechecked, are loaded by primary key.
+        """
+        image_ids = list(image_ids)
+        current = self._current
+        if current is not None and all(image_id in current.urls for image_id in image_ids):
+            return current.version
+        with self._lock:
+            current = self._current
+            if current is None or not all(image_id in current.urls for image_id in image_ids):
+                current = self._refresh()
+            missing = [image_id for image_id in image_ids if image_id not in current.urls]
+            if missing:
+                current = self._extend(self._select(Image.id.in_(missing)))
+                self._counters["fetched_images"] += len(missing)
+            return current.version
+
+    def refresh(self) -> CatalogSnapshot:
+        """Add the images committed since the last refresh."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> CatalogSnapshot:
+        now = time.monotonic()
+        gaps = [gap for gap in self._gaps if now - gap[2] < GAP_TTL][-MAX_GAPS:]
+        added = self._select(
+            or_(Image.id > self._max_id, *(Image.id.between(first, last) for first, last, _ in gaps))
+        )
+        late = [image_id for image_id, _ in added if image_id <= self._max_id]
+        self._counters["late_images"] += len(late)
+        self._gaps = _fill_gaps(gaps, late)
+        previous = self._max_id
+        for image_id, _ in added:
+            if image_id > previous + 1:
+                self._gaps.append((previous + 1, image_id - 1, now))
+            previous = max(previous, image_id)
+        self._max_id = previous
+        current = self._current
+        if current is not None:
+            # Ids ``covering`` fetched by primary key may turn up again here.
+            added = [(image_id, url) for image_id, url in added if image_id not in current.urls]
+            if not added:
+                return current
+        return self._extend(added)
+
+    def _select(self, condition) -> List[Tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(Image.id, Image.file_url).where(condition).order_by(Image.id))
+            return [tuple(row) for row in rows]
+        finally:
+            db.close()
+
+    def _extend(self, added: List[Tuple[int, str]]) -> CatalogSnapshot:
+        current = self._current
+        urls = {**(current.urls if current is not None else {}), **dict(added)}
+        version = len(urls)
+        # Every id is an int, so orjson writes them as the string keys JSON needs.
+        body = orjson.dumps({"version": version, "images": urls}, option=orjson.OPT_NON_STR_KEYS)
+        self._current = CatalogSnapshot(version=version, urls=urls, body=body)
+        self._counters["loads"] += 1
+        return self._current
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._current = None
+            self._max_id = 0
+            self._gaps = []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "version": self.version,
+            "images": len(self._current.urls) if self._current else 0,
+            "max_id": self._max_id,
+            "gaps": len(self._gaps),
+            **self._counters,
+        }
+
+
+def _fill_gaps(gaps: List[Tuple[int, int, float]], found: List[int]) -> List[Tuple[int, int, float]]:
+    """Split ``gaps`` around the sorted ids ``found`` in them."""
+    remaining: List[Tuple[int, int, float]] = []
+    for first, last, noticed in gaps:
+        for image_id in found:
+            if first <= image_id <= last:
+                if image_id > first:
+                    remaining.append((first, image_id - 1, noticed))
+                first = image_id + 1
+        if first <= last:
+            remaining.append((first, last, noticed))
+    return remaining
+
+
+image_catalog = ImageCatalog()
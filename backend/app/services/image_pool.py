@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random
+import threading
+from array import array
+from typing import Dict, Iterable, List, Mapping
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models import Image, ImageType
+
+
+class InsufficientImages(Exception):
+    def __init__(self, image_type: ImageType) -> None:
+        super().__init__(f"Insufficient {image_type.value} images")
+        self.image_type = image_type
+
+
+class _FreeList:
+    """Unordered set of image IDs with O(1) add, discard and random draw."""
+
+    __slots__ = ("_ids", "_positions")
+
+    def __init__(self) -> None:
+        self._ids = array("q")
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, image_id: int) -> None:
+        if image_id in self._positions:
+            return
+        self._positions[image_id] = len(self._ids)
+        self._ids.append(image_id)
+
+    def discard(self, image_id: int) -> None:
+        position = self._positions.pop(image_id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if position < len(self._ids):
+            self._ids[position] = last
+            self._positions[last] = position
+
+    def draw(self, count: int) -> List[int]:
+        drawn: List[int] = []
+        for _ in range(count):
+            image_id = self._ids[random.randrange(len(self._ids))]
+            self.discard(image_id)
+            drawn.append(image_id)
+        return drawn
+
+
+class ImagePool:
+    """In-memory index of images that are free to be placed in a quiz.
+
+    The database stays the source of truth; the pool only tracks which IDs are
+    believed to be unused so a quiz can be built without scanning the images table.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._free: Dict[ImageType, _FreeList] = {image_type: _FreeList() for image_type in ImageType}
+        self._types: Dict[int, ImageType] = {}
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        free = {image_type: _FreeList() for image_type in ImageType}
+        types: Dict[int, ImageType] = {}
+        for image_id, image_type, used in db.query(Image.id, Image.type, Image.used_in_session):
+            types[image_id] = image_type
+            if not used:
+                free[image_type].add(image_id)
+        with self._lock:
+            self._free = free
+            self._types = types
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self.loaded:
+            self.load(db)
+
+    def available(self, image_type: ImageType) -> int:
+        return len(self._free[image_type])
+
+    def draw(self, counts: Mapping[ImageType, int]) -> Dict[ImageType, List[int]]:
+        with self._lock:
+            for image_type, count in counts.items():
+                if len(self._free[image_type]) < count:
+                    raise InsufficientImages(image_type)
+            return {image_type: self._free[image_type].draw(count) for image_type, count in counts.items()}
+
+    def add(self, images: Iterable[tuple[int, ImageType]]) -> None:
+        with self._lock:
+            for image_id, image_type in images:
+                self._types[image_id] = image_type
+                self._free[image_type].add(image_id)
+
+    def release(self, image_ids: Iterable[int]) -> None:
+        with self._lock:
+            for image_id in image_ids:
+                image_type = self._types.get(image_id)
+                if image_type is not None:
+                    self._free[image_type].add(image_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "loaded": int(self.loaded),
+            "known": len(self._types),
+            **{f"free_{image_type.value}": len(self._free[image_type]) for image_type in ImageType},
+        }
+
+
+image_pool = ImagePool()
+
+
+def warm_image_pool() -> None:
+    db = SessionLocal()
+    try:
+        image_pool.load(db)
+    finally:
+        db.close()
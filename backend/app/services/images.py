@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_on_conflict
+from app.models import Image, ImageType
+from app.schemas import ImageCreate, ImageIngestSummary
+from app.services.image_pool import image_pool
+from app.services.ingest import parse_record
+
+INGEST_BATCH_SIZE = 1000
+DEFAULT_IMAGE_PAGE_SIZE = 100
+MAX_IMAGE_PAGE_SIZE = 1000
+
+
+class ImageIngest:
+    """Accumulates validated image rows and inserts them in batches.
+
+    Each batch is one ``INSERT .. ON CONFLICT DO NOTHING`` against the unique
+    ``file_url`` index, so URLs already stored, even by a concurrent upload, are
+    skipped rather than duplicated. Every flushed batch is committed and added
+    to the image pool, so it can be served in quizzes before the upload finishes.
+    """
+
+    def __init__(self, db: Session, uploaded_by: int, batch_size: int = INGEST_BATCH_SIZE) -> None:
+        self.db = db
+        self.uploaded_by = uploaded_by
+        self.batch_size = batch_size
+        self.summary = ImageIngestSummary()
+        self._pending: List[dict] = []
+        self._seen: Set[str] = set()
+
+    def add(self, line_number: int, record: Optional[dict], error: Optional[str] = None) -> bool:
+        """Validate one row; return True once a full batch is waiting to be flushed."""
+        image = parse_record(ImageCreate, self.summary, line_number, record, error)
+        if image is None:
+            return False
+
+        file_url = str(image.file_url)
+        if file_url in self._seen:
+            self.summary.skipped_duplicates += 1
+            return False
+        self._seen.add(file_url)
+        self._pending.append({"file_url": file_url, "type": image.type, "uploaded_by": self.uploaded_by})
+        return len(self._pending) >= self.batch_size
+
+    def flush(self) -> None:
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        inserted = self.db.execute(
+            insert_on_conflict(self.db, Image)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Image.file_url])
+            .returning(Image.id, Image.type)
+        ).all()
+        self.db.commit()
+        self.summary.skipped_duplicates += len(rows) - len(inserted)
+        if not inserted:
+            return
+        image_pool.add((image_id, image_type) for image_id, image_type in inserted)
+
+        ids = [image_id for image_id, _ in inserted]
+        self.summary.inserted += len(ids)
+        if self.summary.first_id is None:
+            self.summary.first_id = min(ids)
+        self.summary.last_id = max(ids)
+
+
+def list_images_page(
+    db: Session,
+    image_type: Optional[ImageType] = None,
+    used_in_session: Optional[bool] = None,
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_IMAGE_PAGE_SIZE,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Return one page of images in id order and the cursor for the next page.
+
+    The cursor is the last id served. Rows are plain dicts with the
+    ``ImageRead`` fields, ready to be encoded without building a model per row.
+    """
+    query = select(Image.file_url, Image.type, Image.id, Image.used_in_session)
+    if image_type is not None:
+        query = query.where(Image.type == image_type)
+    if used_in_session is not None:
+        query = query.where(Image.used_in_session.is_(used_in_session))
+    if cursor is not None:
+        query = query.where(Image.id > cursor)
+    rows = db.execute(query.order_by(Image.id).limit(limit + 1)).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/json-seq", "application/ndjson"}
+CSV_TYPES = {"text/csv", "application/csv"}
+MAX_REPORTED_ERRORS = 20
+
+Record = Tuple[int, Optional[dict], Optional[str]]
+RecordModel = TypeVar("RecordModel", bound=BaseModel)
+
+
+def _record_format(request: Request) -> str:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        return "ndjson"
+    if content_type in CSV_TYPES:
+        return "csv"
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send application/x-ndjson or text/csv",
+    )
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(request: Request) -> AsyncIterator[Record]:
+    """Parse a streamed NDJSON or CSV request body one line at a time.
+
+    Yields ``(line_number, record, error)``; exactly one of ``record`` and
+    ``error`` is set, so callers can count malformed lines without aborting.
+    CSV bodies must start with a header row naming the fields.
+    """
+    record_format = _record_format(request)
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in _iter_lines(request):
+        line_number += 1
+        if not line.strip():
+            continue
+        if record_format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, None, f"expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_number, dict(zip(header, values)), None
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def parse_record(
+    schema: Type[RecordModel], summary: BaseModel, line_number: int, record: Optional[dict], error: Optional[str]
+) -> Optional[RecordModel]:
+    """Validate one record from ``iter_records`` against ``schema``.
+
+    Returns the parsed row, or None after counting it in ``summary.rejected``;
+    the first MAX_REPORTED_ERRORS rejections are listed in ``summary.errors``.
+    """
+    if record is not None:
+        try:
+            return schema.parse_obj(record)
+        except ValidationError as exc:
+            error = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+    summary.rejected += 1
+    if len(summary.errors) < MAX_REPORTED_ERRORS:
+        summary.errors.append(f"line {line_number}: {error}")
+    return None
@@ -2,107 +2,456 @@ from __future__ import annotations
 
 import random
 import uuid
-from typing import Iterable, List, Tuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
 
 from fastapi import HTTPException, status
+from sqlalchemy import Select, case, delete, func, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.models import Image, ImageType, QuizSession, Setting, User
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import (
+    Image,
+    ImageType,
+    PendingImageRelease,
+    QuizQuestion,
+    QuizQuestionOption,
+    QuizReservation,
+    QuizSession,
+    User,
+)
+from app.services.image_pool import InsufficientImages, image_pool
+from app.services.quiz_queue import PreparedQuizQueue, PreparedQuizSet, QuizSignature
+from app.services.quiz_settings import QuizSettings, settings_cache
+from app.services.users import invalidate_user
 
+MAX_RESERVATION_ATTEMPTS = 8
+STALE_POOL_RATIO = 0.25
+MAX_IMAGE_ID = 2**31 - 1
+# Image ids bound per UPDATE when freeing reservations, well below SQLite's variable limit.
+RELEASE_CHUNK_SIZE = 10_000
 
-def get_active_settings(db: Session) -> Setting:
-    setting = db.query(Setting).first()
+quiz_queue = PreparedQuizQueue(capacity=get_settings().quiz_queue_size)
+
+
+def get_active_settings(db: Session) -> QuizSettings:
+    setting = settings_cache.get(db)
     if setting is None:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Quiz settings missing")
     return setting
 
 
-def generate_quiz_session(db: Session, user: User) -> Tuple[QuizSession, List[dict]]:
-    settings = get_active_settings(db)
-    correct_images = (
-        db.query(Image)
-        .filter(Image.type == ImageType.CORRECT, Image.used_in_session.is_(False))
-        .all()
+def _draw_images(db: Session, counts: Dict[ImageType, int]) -> Dict[ImageType, List[int]]:
+    image_pool.ensure_loaded(db)
+    try:
+        return image_pool.draw(counts)
+    except InsufficientImages:
+        # Another worker may have released images since the pool was loaded.
+        image_pool.load(db)
+        try:
+            return image_pool.draw(counts)
+        except InsufficientImages as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+def _claim(db: Session, image_ids: List[int]) -> Set[int]:
+    claim = (
+        update(Image)
+        .where(Image.id.in_(image_ids), Image.used_in_session.is_(False))
+        .values(used_in_session=True)
+        .execution_options(synchronize_session=False)
     )
-    incorrect_images = (
-        db.query(Image)
-        .filter(Image.type == ImageType.INCORRECT, Image.used_in_session.is_(False))
-        .all()
+    return set(db.scalars(claim.returning(Image.id)))
+
+
+def reserve_images(db: Session, counts: Dict[ImageType, int]) -> Dict[ImageType, List[int]]:
+    """Draw images from the pool and claim them in the database.
+
+    The claim is a conditional UPDATE that only flips rows which are still free,
+    so two requests (or two workers with diverging pools) can never hold the same
+    image. Rows lost to another claimant are dropped from the pool and only the
+    shortfall is redrawn (the pool is reloaded if it turns out to be badly out of
+    date). The claim is flushed but not committed; the caller owns the
+    transaction.
+    """
+    reserved: Dict[ImageType, List[int]] = {image_type: [] for image_type in counts}
+    missing = dict(counts)
+    for _ in range(MAX_RESERVATION_ATTEMPTS):
+        drawn = _draw_images(db, missing)
+        image_ids = [image_id for ids in drawn.values() for image_id in ids]
+        try:
+            claimed = _claim(db, image_ids)
+        except Exception:
+            db.rollback()
+            image_pool.release(image_ids + [image_id for ids in reserved.values() for image_id in ids])
+            raise
+        for image_type, ids in drawn.items():
+            won = [image_id for image_id in ids if image_id in claimed]
+            reserved[image_type].extend(won)
+            missing[image_type] -= len(won)
+        if not any(missing.values()):
+            return reserved
+        if len(image_ids) - len(claimed) > len(image_ids) * STALE_POOL_RATIO:
+            # Most of the draw was already taken: other workers have moved on, resync.
+            image_pool.load(db)
+        missing = {image_type: count for image_type, count in missing.items() if count}
+    image_pool.release(image_id for ids in reserved.values() for image_id in ids)
+    db.rollback()
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Image reservation contention, please retry",
+        headers={"Retry-After": "1"},
     )
 
-    if len(correct_images) < settings.num_questions:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient correct images")
-    if len(incorrect_images) < settings.num_questions * (settings.num_options - 1):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient incorrect images")
+
+def build_question_set(db: Session, settings: QuizSettings) -> List[dict]:
+    counts = {
+        ImageType.CORRECT: settings.num_questions,
+        ImageType.INCORRECT: settings.num_questions * (settings.num_options - 1),
+    }
+    drawn = reserve_images(db, counts)
+    correct_ids = drawn[ImageType.CORRECT]
+    incorrect_ids = drawn[ImageType.INCORRECT]
+    try:
+        image_ids = correct_ids + incorrect_ids
+        file_urls = dict(db.execute(select(Image.id, Image.file_url).where(Image.id.in_(image_ids))).all())
+    except Exception:
+        db.rollback()
+        image_pool.release(correct_ids + incorrect_ids)
+        raise
 
     question_set: List[dict] = []
+    options_per_question = settings.num_options - 1
+    for index, correct_id in enumerate(correct_ids):
+        option_ids = [correct_id] + incorrect_ids[index * options_per_question : (index + 1) * options_per_question]
+        random.shuffle(option_ids)
+        question_set.append(
+            {
+                "question_id": str(uuid.uuid4()),
+                "answer_id": correct_id,
+                "options": [{"image_id": image_id, "file_url": file_urls[image_id]} for image_id in option_ids],
+            }
+        )
+    return question_set
 
-    for _ in range(settings.num_questions):
-        correct = random.choice(correct_images)
-        correct_images.remove(correct)
 
-        incorrect_choices = random.sample(incorrect_images, settings.num_options - 1)
-        for incorrect in incorrect_choices:
-            incorrect_images.remove(incorrect)
+def _question_set_image_ids(question_set: List[dict]) -> List[int]:
+    return [option["image_id"] for question in question_set for option in question["options"]]
 
-        all_options = [correct] + incorrect_choices
-        for image in all_options:
-            image.used_in_session = True
 
-        question_id = str(uuid.uuid4())
-        shuffled = all_options[:]
-        random.shuffle(shuffled)
+def insert_questions(db: Session, question_sets: Mapping[int, List[dict]]) -> None:
+    """Store generated question sets, keyed by session id, in the question tables.
 
-        question_set.append(
+    Questions and options are written with one multi-row INSERT each rather than
+    through the unit of work, since this runs while the write lock is held.
+    """
+    questions = [
+        (session_id, position, question)
+        for session_id, question_set in question_sets.items()
+        for position, question in enumerate(question_set)
+    ]
+    if not questions:
+        return
+    question_ids = db.scalars(
+        insert(QuizQuestion).returning(QuizQuestion.id, sort_by_parameter_order=True),
+        [
             {
-                "question_id": question_id,
-                "answer_id": correct.id,
-                "options": [
-                    {
-                        "image_id": image.id,
-                        "file_url": image.file_url,
-                    }
-                    for image in shuffled
-                ],
+                "session_id": session_id,
+                "position": position,
+                "public_id": question["question_id"],
+                "answer_image_id": question["answer_id"],
             }
-        )
+            for session_id, position, question in questions
+        ],
+    ).all()
+    db.execute(
+        insert(QuizQuestionOption),
+        [
+            {"question_id": question_id, "position": position, "image_id": option["image_id"]}
+            for question_id, (_, _, question) in zip(question_ids, questions)
+            for position, option in enumerate(question["options"])
+        ],
+    )
 
-    session = QuizSession(user_id=user.id, question_set=question_set, is_retest=user.can_retake)
-    user.can_retake = False
-    db.add(session)
-    db.commit()
+
+def open_session_clause(now: datetime):
+    """Sessions whose lease is still running; submitted and expired ones have none."""
+    return QuizSession.expires_at > now
+
+
+def leased_session_image_ids():
+    """Subquery of the images held by sessions that still carry a lease.
+
+    Those are the open sessions and the overdue ones the reaper has yet to
+    expire; either a submission or the reaper will free their images.
+    """
+    return (
+        select(QuizQuestionOption.image_id)
+        .join(QuizQuestion, QuizQuestionOption.question_id == QuizQuestion.id)
+        .join(QuizSession, QuizQuestion.session_id == QuizSession.id)
+        .where(QuizSession.expires_at.is_not(None))
+    )
+
+
+def close_session(db: Session, session_id: int, now: datetime) -> bool:
+    """End a session's lease, unless it has already run out.
+
+    The conditional UPDATE is the one point a submission and the reaper race
+    on, so exactly one of them closes the session and frees its images.
+    """
+    closed = db.execute(
+        update(QuizSession)
+        .where(QuizSession.id == session_id, open_session_clause(now))
+        .values(expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return closed.rowcount == 1
+
+
+def _signature(settings: QuizSettings) -> QuizSignature:
+    return settings.num_questions, settings.num_options
+
+
+def generate_quiz_session(db: Session, user: User) -> Tuple[QuizSession, List[dict]]:
+    settings = get_active_settings(db)
+    prepared = _pop_prepared(db, _signature(settings))
+    question_set = prepared.question_set if prepared else build_question_set(db, settings)
+    try:
+        session = QuizSession(
+            user_id=user.id,
+            is_retest=user.can_retake,
+            expires_at=datetime.utcnow() + timedelta(minutes=get_settings().session_lease_minutes),
+        )
+        user.can_retake = False
+        db.add(session)
+        db.flush()
+        insert_questions(db, {session.id: question_set})
+        db.commit()
+    except Exception:
+        db.rollback()
+        if prepared:
+            quiz_queue.push_front(prepared)
+        else:
+            image_pool.release(_question_set_image_ids(question_set))
+        raise
+    invalidate_user(user.id)
     db.refresh(session)
 
     return session, question_set
 
 
-def evaluate_submission(session: QuizSession, answers: List[dict], passing_score: int) -> Tuple[int, bool, List[int]]:
-    question_map = {q["question_id"]: q for q in session.question_set}
-    total_questions = len(question_map)
-    correct_count = 0
-    used_image_ids: List[int] = []
+def _pop_prepared(db: Session, signature: QuizSignature) -> Optional[PreparedQuizSet]:
+    """Pop a prepared set and take over its reservation in the caller's transaction.
+
+    Deleting the reservation row is what hands the images to the new session.
+    A set whose row is already gone lost its images to the reaper or to an
+    image reset; it is dropped and the next one tried.
+    """
+    while True:
+        prepared = quiz_queue.pop(signature)
+        if prepared is None:
+            return None
+        try:
+            taken = db.execute(delete(QuizReservation).where(QuizReservation.id == prepared.reservation_id)).rowcount
+        except Exception:
+            db.rollback()
+            quiz_queue.push_front(prepared)
+            raise
+        if taken:
+            return prepared
+        quiz_queue.reclaimed()
+        # Freed in the database; draws claim them again only if they are still free.
+        image_pool.release(_question_set_image_ids(prepared.question_set))
+
 
-    for question in session.question_set:
-        for option in question["options"]:
-            used_image_ids.append(option["image_id"])
+def release_reservations(db: Session, reservation_ids: Union[List[int], Select]) -> List[int]:
+    """Delete reservations and free the images of the ones deleted.
+
+    Runs in the caller's transaction, which returns the images to the pool
+    after committing. Reservations another transaction deleted first are
+    skipped, so their images are never freed twice.
+    """
+    deleted = db.scalars(
+        delete(QuizReservation)
+        .where(QuizReservation.id.in_(reservation_ids))
+        .returning(QuizReservation.image_ids)
+        .execution_options(synchronize_session=False)
+    )
+    image_ids = [image_id for reserved in deleted for image_id in reserved]
+    for start in range(0, len(image_ids), RELEASE_CHUNK_SIZE):
+        db.execute(
+            update(Image)
+            .where(Image.id.in_(image_ids[start : start + RELEASE_CHUNK_SIZE]))
+            .values(used_in_session=False)
+            .execution_options(synchronize_session=False)
+        )
+    return image_ids
+
+
+def _release_prepared(db: Session, prepared_sets: List[PreparedQuizSet]) -> None:
+    if not prepared_sets:
+        return
+    image_ids = release_reservations(db, [prepared.reservation_id for prepared in prepared_sets])
+    db.commit()
+    image_pool.release(image_ids)
+
+
+def _queue_lease() -> timedelta:
+    return timedelta(seconds=get_settings().quiz_queue_lease_seconds)
+
+
+def _reserve_prepared(db: Session, question_set: List[dict]) -> int:
+    return db.scalar(
+        insert(QuizReservation)
+        .values(image_ids=_question_set_image_ids(question_set), expires_at=datetime.utcnow() + _queue_lease())
+        .returning(QuizReservation.id)
+    )
+
+
+def _renew_reservations(db: Session) -> None:
+    # Renewed at half the lease, so a queued set always has half a lease left.
+    reservation_ids = quiz_queue.due_for_renewal(_queue_lease().total_seconds() / 2)
+    if reservation_ids:
+        db.execute(
+            update(QuizReservation)
+            .where(QuizReservation.id.in_(reservation_ids))
+            .values(expires_at=datetime.utcnow() + _queue_lease())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def fill_quiz_queue() -> int:
+    """Top up the prepared quiz queue to capacity using the current settings.
+
+    Each prepared set's images are committed as claimed together with a
+    ``QuizReservation`` whose lease this renews while the set waits. If the
+    worker dies, the reaper frees the images once the lease runs out.
+    """
+    db = SessionLocal()
+    try:
+        settings = get_active_settings(db)
+        signature = _signature(settings)
+        quiz_queue.retain(signature)
+        _release_prepared(db, quiz_queue.take_stale())
+        _renew_reservations(db)
+
+        built = 0
+        while len(quiz_queue) < quiz_queue.capacity:
+            try:
+                question_set = build_question_set(db, settings)
+            except HTTPException:
+                # Pool exhausted or contended; leave the remaining images to live requests.
+                break
+            try:
+                reservation_id = _reserve_prepared(db, question_set)
+                db.commit()
+            except Exception:
+                db.rollback()
+                image_pool.release(_question_set_image_ids(question_set))
+                raise
+            quiz_queue.push(PreparedQuizSet(signature=signature, question_set=question_set, reservation_id=reservation_id))
+            built += 1
+        return built
+    finally:
+        db.close()
 
-    for answer in answers:
-        question = question_map.get(answer["question_id"])
-        if question and answer["selected_image_id"] == question["answer_id"]:
-            correct_count += 1
+
+def invalidate_quiz_queue(db: Session) -> None:
+    _release_prepared(db, quiz_queue.drain())
+
+
+def evaluate_submission(db: Session, session: QuizSession, answers: Mapping[str, int], passing_score: int) -> Tuple[int, bool]:
+    """Record the selected images on the session's questions and score them.
+
+    ``answers`` maps question ids to the selected image id. Answers are stored
+    with one UPDATE and counted with one aggregate query over the session's
+    questions; answers to questions outside the session are ignored. A selected
+    image that is not one of the question's options is stored as NULL and
+    scored as wrong, so a client cannot trip the ``images`` foreign key.
+    """
+    # Ids no integer column can hold are wrong answers too, and must not reach the driver.
+    answers = {question_id: image_id for question_id, image_id in answers.items() if 0 < image_id <= MAX_IMAGE_ID}
+    if answers:
+        selected = case(answers, value=QuizQuestion.public_id)
+        offered = (
+            select(QuizQuestionOption.id)
+            .where(QuizQuestionOption.question_id == QuizQuestion.id, QuizQuestionOption.image_id == selected)
+            .exists()
+        )
+        db.execute(
+            update(QuizQuestion)
+            .where(QuizQuestion.session_id == session.id, QuizQuestion.public_id.in_(list(answers)))
+            .values(selected_image_id=case((offered, selected)))
+            .execution_options(synchronize_session=False)
+        )
+    total_questions, correct_count = db.execute(
+        select(
+            func.count(QuizQuestion.id),
+            func.count(case((QuizQuestion.selected_image_id == QuizQuestion.answer_image_id, 1))),
+        ).where(QuizQuestion.session_id == session.id)
+    ).one()
 
     score = int((correct_count / total_questions) * 100) if total_questions else 0
     passed = score >= passing_score
-    return score, passed, used_image_ids
+    return score, passed
 
 
-def release_images(db: Session, image_ids: Iterable[int]) -> None:
-    if not image_ids:
-        return
-    (
-        db.query(Image)
-        .filter(Image.id.in_(set(image_ids)))
-        .update({Image.used_in_session: False}, synchronize_session=False)
+def queue_image_release(db: Session, session_id: int) -> None:
+    """Queue a session's images for release as part of the caller's transaction."""
+    db.add(PendingImageRelease(session_id=session_id))
+
+
+def release_session_images(db: Session, session_ids: List[int]) -> List[int]:
+    session_image_ids = (
+        select(QuizQuestionOption.image_id)
+        .join(QuizQuestion, QuizQuestionOption.question_id == QuizQuestion.id)
+        .where(QuizQuestion.session_id.in_(session_ids))
     )
-    db.commit()
+    return list(
+        db.scalars(
+            update(Image)
+            .where(Image.id.in_(session_image_ids))
+            .values(used_in_session=False)
+            .returning(Image.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+
+
+def _claim_pending_releases(db: Session, batch_size: int) -> List[int]:
+    batch = select(PendingImageRelease.id).order_by(PendingImageRelease.id).limit(batch_size)
+    return list(
+        db.scalars(
+            delete(PendingImageRelease)
+            .where(PendingImageRelease.id.in_(batch))
+            .returning(PendingImageRelease.session_id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+
+
+def release_pending_images(batch_size: int = get_settings().image_release_batch_size) -> int:
+    """Free the images of sessions queued by ``queue_image_release``.
 
+    Each batch claims its queue rows by deleting them and frees the sessions'
+    images in the same transaction. Releasers in other workers therefore never
+    free a session twice, and a crash leaves the rows queued for the next run.
+    Returns the number of sessions released.
+    """
+    db = SessionLocal()
+    released = 0
+    try:
+        while True:
+            session_ids = _claim_pending_releases(db, batch_size)
+            if not session_ids:
+                return released
+            image_ids = release_session_images(db, session_ids)
+            db.commit()
+            image_pool.release(image_ids)
+            released += len(session_ids)
+            if len(session_ids) < batch_size:
+                return released
+    finally:
+        db.close()
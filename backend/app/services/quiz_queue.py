@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+QuizSignature = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class PreparedQuizSet:
+    """A question set whose images are already reserved, waiting for a user.
+
+    ``reservation_id`` is the ``QuizReservation`` row holding the images.
+    """
+
+    signature: QuizSignature
+    question_set: List[dict]
+    reservation_id: int
+    prepared_at: float = field(default_factory=time.monotonic)
+
+
+class PreparedQuizQueue:
+    """Bounded FIFO of prepared question sets.
+
+    Sets are tagged with the ``(num_questions, num_options)`` they were built for.
+    Popping skips sets built for other settings and parks them as stale; stale
+    sets still hold reserved images, so whoever drains them must release those.
+    Drained sets that are dropped without a release are reclaimed by the reaper
+    once their reservation's lease runs out.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._sets: Deque[PreparedQuizSet] = deque()
+        self._stale: List[PreparedQuizSet] = []
+        self._lock = threading.Lock()
+        self._renewed_at = time.monotonic()
+        self._counters = {"prepared": 0, "served": 0, "missed": 0, "invalidated": 0, "reclaimed": 0}
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def push(self, prepared: PreparedQuizSet) -> None:
+        with self._lock:
+            self._sets.append(prepared)
+            self._counters["prepared"] += 1
+
+    def push_front(self, prepared: PreparedQuizSet) -> None:
+        with self._lock:
+            self._sets.appendleft(prepared)
+
+    def pop(self, signature: QuizSignature) -> Optional[PreparedQuizSet]:
+        with self._lock:
+            while self._sets:
+                prepared = self._sets.popleft()
+                if prepared.signature == signature:
+                    self._counters["served"] += 1
+                    return prepared
+                self._stale.append(prepared)
+                self._counters["invalidated"] += 1
+            self._counters["missed"] += 1
+            return None
+
+    def reclaimed(self) -> None:
+        """Count a popped set whose reservation had already been reclaimed."""
+        with self._lock:
+            self._counters["reclaimed"] += 1
+
+    def due_for_renewal(self, interval: float) -> List[int]:
+        """Reservation ids of the queued sets, once every ``interval`` seconds; else empty."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._renewed_at < interval:
+                return []
+            self._renewed_at = now
+            return [prepared.reservation_id for prepared in self._sets]
+
+    def retain(self, signature: QuizSignature) -> None:
+        with self._lock:
+            kept = [prepared for prepared in self._sets if prepared.signature == signature]
+            self._counters["invalidated"] += len(self._sets) - len(kept)
+            self._stale.extend(prepared for prepared in self._sets if prepared.signature != signature)
+            self._sets = deque(kept)
+
+    def take_stale(self) -> List[PreparedQuizSet]:
+        with self._lock:
+            stale, self._stale = self._stale, []
+            return stale
+
+    def drain(self) -> List[PreparedQuizSet]:
+        with self._lock:
+            drained = list(self._sets) + self._stale
+            self._counters["invalidated"] += len(self._sets)
+            self._sets.clear()
+            self._stale = []
+            return drained
+
+    def stats(self) -> Dict[str, int]:
+        return {"depth": len(self._sets), "capacity": self.capacity, "stale": len(self._stale), **self._counters}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models import Setting
+
+
+@dataclass(frozen=True)
+class QuizSettings:
+    passing_score: int
+    num_questions: int
+    num_options: int
+    version: int
+
+
+class SettingsCache:
+    """In-process copy of the quiz settings row.
+
+    Reads are served from memory. At most once per ``check_interval`` seconds the
+    cache compares its version with the row's ``version`` column, so a change
+    made through another worker is picked up with a single-column lookup.
+    """
+
+    def __init__(self, check_interval: float) -> None:
+        self.check_interval = check_interval
+        self._current: Optional[QuizSettings] = None
+        self._checked_at = 0.0
+
+    def get(self, db: Session) -> Optional[QuizSettings]:
+        # No lock around the queries: under AsyncSession.run_sync they yield to the
+        # event loop, and concurrent refreshes simply store the same snapshot.
+        current = self._current
+        now = time.monotonic()
+        if current is not None and now - self._checked_at < self.check_interval:
+            return current
+        if current is not None:
+            version = db.scalar(select(Setting.version).order_by(Setting.id).limit(1))
+            if version == current.version:
+                self._checked_at = now
+                return current
+        return self._load(db, now)
+
+    def _load(self, db: Session, now: float) -> Optional[QuizSettings]:
+        setting = db.query(Setting).order_by(Setting.id).first()
+        if setting is None:
+            self._current = None
+            return None
+        self._current = QuizSettings(
+            passing_score=setting.passing_score,
+            num_questions=setting.num_questions,
+            num_options=setting.num_options,
+            version=setting.version,
+        )
+        self._checked_at = now
+        return self._current
+
+    def invalidate(self) -> None:
+        self._current = None
+
+
+settings_cache = SettingsCache(check_interval=get_settings().settings_check_interval)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.session import ReportSessionLocal, SessionLocal
+from app.db.upsert import insert_on_conflict
+from app.models import ReplicaHeartbeat
+
+HEARTBEAT_ID = 1
+
+
+def write_heartbeat() -> None:
+    """Stamp the heartbeat row on the primary database with the current time."""
+    db = SessionLocal()
+    try:
+        statement = insert_on_conflict(db, ReplicaHeartbeat).values(id=HEARTBEAT_ID, beat_at=datetime.utcnow())
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ReplicaHeartbeat.id], set_={"beat_at": statement.excluded.beat_at}
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+class ReportFreshness:
+    """How current the data behind admin reports is.
+
+    Without a replica, reports read the primary database and are current as of
+    the moment they start. A replica is as current as the newest heartbeat it
+    has applied; since heartbeats are written every
+    ``REPORT_HEARTBEAT_INTERVAL`` seconds, the lag measured from it can be
+    that much higher than the replica's real lag, never lower.
+    """
+
+    def __init__(self, replica: bool) -> None:
+        self.replica = replica
+        self._lock = threading.Lock()
+        self._counters = {"checks": 0, "unknown": 0, "lag_ms": 0, "max_lag_ms": 0}
+
+    def data_as_of(self) -> Optional[datetime]:
+        """When the data a report started now will show was current; None if not known yet."""
+        now = datetime.utcnow()
+        if not self.replica:
+            return now
+        db = ReportSessionLocal()
+        try:
+            beat_at = db.scalar(select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == HEARTBEAT_ID))
+        finally:
+            db.close()
+        with self._lock:
+            self._counters["checks"] += 1
+            if beat_at is None:
+                self._counters["unknown"] += 1
+                return None
+            lag_ms = max(0, round((now - beat_at).total_seconds() * 1000))
+            self._counters["lag_ms"] = lag_ms
+            self._counters["max_lag_ms"] = max(self._counters["max_lag_ms"], lag_ms)
+        return beat_at
+
+    def headers(self) -> Dict[str, str]:
+        as_of = self.data_as_of()
+        return {"X-Data-As-Of": as_of.isoformat()} if as_of is not None else {}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"replica": int(self.replica), **self._counters}
+
+
+report_freshness = ReportFreshness(replica=bool(get_settings().report_database_url))
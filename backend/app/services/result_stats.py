@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_on_conflict
+from app.models import ArchivedSession, QuizSession, ResultCounter
+from app.schemas import DailyResultStats, ResultStats, ScoreBucket
+
+TOTAL = ""
+SCORE_BUCKET_WIDTH = 10
+SCORE_BUCKETS = range(0, 100, SCORE_BUCKET_WIDTH)
+DAILY_METRICS = ("submitted", "passed", "failed", "retest_sessions", "retests_approved")
+# Approvals are not recorded on quiz_sessions, so a rebuild keeps the running tally.
+UNREBUILDABLE_METRICS = ("retests_approved",)
+
+CounterKey = Tuple[str, str]
+
+
+def _bucket_metric(score: int) -> str:
+    bucket = min(score // SCORE_BUCKET_WIDTH * SCORE_BUCKET_WIDTH, SCORE_BUCKETS[-1])
+    return f"score_{bucket}"
+
+
+def _session_counters(passed: bool, is_retest: bool, score: int, day: str, sessions: int = 1) -> Counter:
+    counters: Counter = Counter()
+    for metric in ("submitted", "passed" if passed else "failed") + (("retest_sessions",) if is_retest else ()):
+        counters[(metric, TOTAL)] += sessions
+        counters[(metric, day)] += sessions
+    counters[("score_total", TOTAL)] += score * sessions
+    counters[(_bucket_metric(score), TOTAL)] += sessions
+    return counters
+
+
+def _increment(db: Session, counters: Dict[CounterKey, int]) -> None:
+    """Add ``counters`` to the stored tallies with one upsert; the caller commits."""
+    if not counters:
+        return
+    statement = insert_on_conflict(db, ResultCounter).values(
+        [{"metric": metric, "period": period, "value": value} for (metric, period), value in counters.items()]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ResultCounter.metric, ResultCounter.period],
+            set_={"value": ResultCounter.value + statement.excluded.value},
+        )
+    )
+
+
+def record_submission(db: Session, session: QuizSession) -> None:
+    _increment(
+        db,
+        _session_counters(session.passed, session.is_retest, session.score, session.submitted_at.date().isoformat()),
+    )
+
+
+def record_retest_approvals(db: Session, approved: int) -> None:
+    today = datetime.utcnow().date().isoformat()
+    _increment(db, {("retests_approved", TOTAL): approved, ("retests_approved", today): approved})
+
+
+def get_result_stats(db: Session, days: int = 30) -> ResultStats:
+    """Read the summary from the counter table; cost depends on ``days``, not on session count."""
+    since = (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+    totals = dict(
+        db.execute(select(ResultCounter.metric, ResultCounter.value).where(ResultCounter.period == TOTAL)).all()
+    )
+    daily: Dict[str, DailyResultStats] = {}
+    rows = db.execute(
+        select(ResultCounter.metric, ResultCounter.period, ResultCounter.value)
+        .where(ResultCounter.metric.in_(DAILY_METRICS), ResultCounter.period >= since)
+        .order_by(ResultCounter.period)
+    )
+    for metric, period, value in rows:
+        entry = daily.setdefault(period, DailyResultStats(day=date.fromisoformat(period)))
+        setattr(entry, metric, value)
+
+    submitted = totals.get("submitted", 0)
+    return ResultStats(
+        **{metric: totals.get(metric, 0) for metric in DAILY_METRICS},
+        pass_rate=round(totals.get("passed", 0) / submitted, 4) if submitted else None,
+        mean_score=round(totals.get("score_total", 0) / submitted, 2) if submitted else None,
+        score_histogram=[
+            ScoreBucket(
+                min_score=bucket,
+                max_score=100 if bucket == SCORE_BUCKETS[-1] else bucket + SCORE_BUCKET_WIDTH - 1,
+                sessions=totals.get(f"score_{bucket}", 0),
+            )
+            for bucket in SCORE_BUCKETS
+        ],
+        daily=list(daily.values()),
+    )
+
+
+def _count_sessions(db: Session) -> Counter:
+    counters: Counter = Counter()
+    for model in (QuizSession, ArchivedSession):
+        rows = db.execute(
+            select(model.passed, model.is_retest, model.score, func.date(model.submitted_at), func.count())
+            .where(model.submitted_at.is_not(None))
+            .group_by(model.passed, model.is_retest, model.score, func.date(model.submitted_at))
+        )
+        for passed, is_retest, score, day, sessions in rows:
+            day = day.isoformat() if isinstance(day, date) else day
+            counters.update(_session_counters(passed, is_retest, score or 0, day, sessions))
+    return counters
+
+
+def _stored_counters(db: Session, remove: bool) -> Dict[CounterKey, int]:
+    rebuildable = ResultCounter.metric.not_in(UNREBUILDABLE_METRICS)
+    columns = (ResultCounter.metric, ResultCounter.period, ResultCounter.value)
+    if remove:
+        rows = db.execute(
+            delete(ResultCounter).where(rebuildable).returning(*columns).execution_options(synchronize_session=False)
+        ).all()
+    else:
+        rows = db.execute(select(*columns).where(rebuildable)).all()
+    return {(metric, period): value for metric, period, value in rows}
+
+
+def rebuild_result_counters(db: Session, check_only: bool = False) -> Dict[CounterKey, Tuple[int, int]]:
+    """Recompute the counters from all submitted sessions and return ``{key: (stored, rebuilt)}`` for mismatches.
+
+    Unless ``check_only`` is set, the stored counters are replaced in the same
+    transaction. The old rows are removed before the sessions are counted, so
+    the table stays locked against concurrent submissions until the commit.
+    """
+    if not check_only and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE result_counters IN SHARE ROW EXCLUSIVE MODE"))
+    stored = _stored_counters(db, remove=not check_only)
+    rebuilt = _count_sessions(db)
+    mismatches = {
+        key: (stored.get(key, 0), rebuilt.get(key, 0))
+        for key in stored.keys() | rebuilt.keys()
+        if stored.get(key, 0) != rebuilt.get(key, 0)
+    }
+    if check_only:
+        db.rollback()
+        return mismatches
+
+    if rebuilt:
+        db.execute(
+            insert(ResultCounter),
+            [{"metric": metric, "period": period, "value": value} for (metric, period), value in rebuilt.items()],
+        )
+    db.commit()
+    return mismatches
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import csv
+import heapq
+import io
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.db.session import ReportSessionLocal
+from app.models import ArchivedSession, QuizSession, User
+
+CSV_BATCH_SIZE = 1000
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Fields of SessionResult, in order.
+RESULT_COLUMNS = (
+    "session_id",
+    "employee_id",
+    "name",
+    "score",
+    "passed",
+    "created_at",
+    "submitted_at",
+    "expired_at",
+    "is_retest",
+)
+CSV_HEADER = ["사원번호", "이름", "점수", "합격여부", "응시일", "재시험여부"]
+
+
+@dataclass(frozen=True)
+class ResultFilters:
+    status: Optional[str] = None
+    employee_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    score_min: Optional[int] = None
+    score_max: Optional[int] = None
+
+    def clauses(self, model: Any = QuizSession) -> list:
+        """Filter conditions on ``model``, quiz_sessions or its archive."""
+        clauses = []
+        if self.status == "pass":
+            clauses.append(model.passed.is_(True))
+        elif self.status == "fail":
+            clauses.append(model.passed.is_(False))
+        elif self.status == "retest":
+            clauses.append(model.is_retest.is_(True))
+        if self.employee_id is not None:
+            clauses.append(User.employee_id == self.employee_id)
+        if self.date_from is not None:
+            clauses.append(model.created_at >= self.date_from)
+        if self.date_to is not None:
+            clauses.append(model.created_at < self.date_to)
+        if self.score_min is not None:
+            clauses.append(model.score >= self.score_min)
+        if self.score_max is not None:
+            clauses.append(model.score <= self.score_max)
+        return clauses
+
+
+def _result_rows(model: Any, *columns: str):
+    """Select ``columns`` of the results, in the same shape for quiz_sessions and its archive."""
+    available = {
+        "session_id": model.id.label("session_id"),
+        "employee_id": User.employee_id,
+        "name": User.name,
+        "score": model.score,
+        "passed": model.passed,
+        "created_at": model.created_at,
+        "submitted_at": model.submitted_at,
+        "expired_at": model.expired_at,
+        "is_retest": model.is_retest,
+    }
+    return select(*(available[name] for name in columns)).join(User, model.user_id == User.id)
+
+
+def encode_cursor(created_at: datetime, session_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{session_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(session_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def list_results_page(
+    db: Session,
+    filters: ResultFilters,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return one page of results, newest first, and the cursor for the next page.
+
+    Pages are addressed by the ``(created_at, id)`` of the last row served, so
+    each page is an index range scan regardless of how deep into history it is.
+    Archived sessions keep their ids, so a cursor is unique across both tables
+    and a page is the newest ``limit`` rows of one such scan on quiz_sessions
+    and one on the archive. Rows are plain dicts with the ``SessionResult``
+    fields, ready to be encoded without building a model per row.
+    """
+    after = decode_cursor(cursor) if cursor is not None else None
+    branches = []
+    for model in (QuizSession, ArchivedSession):
+        branch = _result_rows(model, *RESULT_COLUMNS).where(*filters.clauses(model))
+        if after is not None:
+            branch = branch.where(tuple_(model.created_at, model.id) < after)
+        branch = branch.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+        branches.append(select(branch.subquery()))
+    page = union_all(*branches).subquery()
+    rows = db.execute(
+        select(page).order_by(page.c.created_at.desc(), page.c.session_id.desc()).limit(limit + 1)
+    ).all()
+
+    results = [row._asdict() for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].session_id) if len(rows) > limit else None
+    return results, next_cursor
+
+
+def iter_results_csv(compress: bool = False, batch_size: int = CSV_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield the results export as UTF-8 CSV chunks, one per fetched batch.
+
+    Rows are streamed from the database ``batch_size`` at a time, so memory use
+    does not depend on how many sessions exist; archived sessions are merged
+    into the same newest-first order. The generator owns its own session on
+    the reporting engine because it keeps running after the request
+    dependencies are closed.
+    """
+    encoder = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return encoder.compress(chunk) if encoder else chunk
+
+    writer.writerow(CSV_HEADER)
+    yield flush()
+
+    db = ReportSessionLocal()
+    try:
+        # Each table is read newest first along its (created_at, id) index and the
+        # two streams are merged here; ordering their UNION in SQL would sort it all first.
+        columns = ("employee_id", "name", "score", "passed", "created_at", "is_retest", "session_id")
+        streams = [
+            db.execute(
+                _result_rows(model, *columns)
+                .order_by(model.created_at.desc(), model.id.desc())
+                .execution_options(yield_per=batch_size)
+            )
+            for model in (QuizSession, ArchivedSession)
+        ]
+        rows = heapq.merge(*streams, key=itemgetter(4, 6), reverse=True)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            writer.writerows(
+                [
+                    employee_id,
+                    name,
+                    score if score is not None else "",
+                    "합격" if passed else "불합격",
+                    created_at.isoformat(),
+                    "Y" if is_retest else "N",
+                ]
+                for employee_id, name, score, passed, created_at, is_retest, _ in batch
+            )
+            chunk = flush()
+            if chunk:
+                yield chunk
+    finally:
+        db.close()
+
+    if encoder:
+        yield encoder.flush()
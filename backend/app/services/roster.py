@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.upsert import insert_on_conflict
+from app.models import User, UserRole
+from app.schemas import RosterImportSummary, UserBase
+from app.services.ingest import parse_record
+
+ROSTER_BATCH_SIZE = 1000
+
+
+class RosterImport:
+    """Accumulates validated roster rows and registers them in batches.
+
+    Each batch is one ``INSERT .. ON CONFLICT DO NOTHING`` against the
+    ``(employee_id, name)`` unique index, so employees who already have an
+    account (or appear twice in the upload) are skipped rather than duplicated.
+    Every flushed batch is committed, so a failed upload keeps what it stored.
+    """
+
+    def __init__(self, db: Session, batch_size: int = ROSTER_BATCH_SIZE) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.summary = RosterImportSummary()
+        self._pending: List[dict] = []
+        self._seen: Set[Tuple[str, str]] = set()
+
+    def add(self, line_number: int, record: Optional[dict], error: Optional[str] = None) -> bool:
+        """Validate one row; return True once a full batch is waiting to be flushed."""
+        employee = parse_record(UserBase, self.summary, line_number, record, error)
+        if employee is None:
+            return False
+
+        key = (employee.employee_id, employee.name)
+        if key in self._seen:
+            self.summary.skipped_existing += 1
+            return False
+        self._seen.add(key)
+        self._pending.append({"employee_id": employee.employee_id, "name": employee.name, "role": UserRole.USER})
+        return len(self._pending) >= self.batch_size
+
+    def flush(self) -> None:
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        inserted = self.db.execute(
+            insert_on_conflict(self.db, User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.employee_id, User.name])
+            .returning(User.id)
+        ).all()
+        self.db.commit()
+        self.summary.inserted += len(inserted)
+        self.summary.skipped_existing += len(rows) - len(inserted)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import QuizReservation, QuizSession, User
+from app.services.image_pool import image_pool
+from app.services.quiz import release_reservations, release_session_images
+from app.services.users import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+
+def _claim_overdue_sessions(db: Session, now: datetime, batch_size: int) -> List[Tuple[int, int, bool]]:
+    overdue = select(QuizSession.id).where(QuizSession.expires_at <= now).order_by(QuizSession.expires_at).limit(batch_size)
+    claimed = db.execute(
+        update(QuizSession)
+        .where(QuizSession.id.in_(overdue), QuizSession.expires_at <= now)
+        .values(expires_at=None, expired_at=now)
+        .returning(QuizSession.id, QuizSession.user_id, QuizSession.is_retest)
+        .execution_options(synchronize_session=False)
+    )
+    return [tuple(row) for row in claimed]
+
+
+class SessionReaper:
+    """Expires sessions whose lease ran out and returns their images to the pool.
+
+    Only open sessions carry a lease, so each sweep reads the overdue rows
+    through the ``expires_at`` index and costs time in proportion to what it
+    expires. A batch expires its sessions, frees their images with one UPDATE
+    and gives back the retake permission a retest used, all in one transaction.
+    Quiz queue reservations whose lease ran out are freed the same way.
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._counters = {"sweeps": 0, "expired_sessions": 0, "expired_reservations": 0, "released_images": 0}
+
+    def sweep(self) -> int:
+        """Expire every overdue session; returns the number expired."""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        expired = released = 0
+        try:
+            while True:
+                sessions = _claim_overdue_sessions(db, now, self.batch_size)
+                if not sessions:
+                    break
+                image_ids = release_session_images(db, [session_id for session_id, _, _ in sessions])
+                retest_users = {user_id for _, user_id, is_retest in sessions if is_retest}
+                if retest_users:
+                    db.execute(
+                        update(User)
+                        .where(User.id.in_(retest_users))
+                        .values(can_retake=True)
+                        .execution_options(synchronize_session=False)
+                    )
+                db.commit()
+                image_pool.release(image_ids)
+                for user_id in retest_users:
+                    invalidate_user(user_id)
+                expired += len(sessions)
+                released += len(image_ids)
+                if len(sessions) < self.batch_size:
+                    break
+            reservations, reservation_images = self._sweep_reservations(db, now)
+        finally:
+            db.close()
+        released += reservation_images
+        with self._lock:
+            self._counters["sweeps"] += 1
+            self._counters["expired_sessions"] += expired
+            self._counters["expired_reservations"] += reservations
+            self._counters["released_images"] += released
+        if expired or reservations:
+            logger.info(
+                "Expired %d abandoned quiz sessions and %d quiz queue reservations, released %d images",
+                expired,
+                reservations,
+                released,
+            )
+        return expired
+
+    def _sweep_reservations(self, db: Session, now: datetime) -> Tuple[int, int]:
+        """Free reservations left behind by quiz queues that stopped renewing them."""
+        expired = released = 0
+        overdue = (
+            select(QuizReservation.id)
+            .where(QuizReservation.expires_at <= now)
+            .order_by(QuizReservation.expires_at)
+            .limit(self.batch_size)
+        )
+        while True:
+            reservation_ids = list(db.scalars(overdue))
+            if not reservation_ids:
+                break
+            image_ids = release_reservations(db, reservation_ids)
+            db.commit()
+            image_pool.release(image_ids)
+            expired += len(reservation_ids)
+            released += len(image_ids)
+            if len(reservation_ids) < self.batch_size:
+                break
+        return expired, released
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+session_reaper = SessionReaper(batch_size=get_settings().session_reap_batch_size)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models import User
+
+settings = get_settings()
+
+# Column values of recently authenticated users, keyed by user id. Snapshots are
+# plain dicts so one cached entry can be shared safely by concurrent requests.
+user_cache: TTLCache[int, Dict[str, Any]] = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+# How far back each revocation check looks before the newest cutoff it has seen,
+# for revocations stamped earlier but committed later, or by a worker whose clock trails.
+REVOCATION_OVERLAP = timedelta(seconds=30)
+
+
+def get_user(db: Session, user_id: int) -> Optional[User]:
+    """Load a user, serving repeat lookups from the user cache without a SELECT.
+
+    A cached user is attached to ``db`` as a persistent instance, so attribute
+    changes made by the caller are flushed as ordinary UPDATEs.
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = db.identity_map.get(inspect(User).identity_key_from_primary_key((user_id,)))
+        if user is None:
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            db.add(user)
+        return user
+
+    user = db.get(User, user_id)
+    if user is not None:
+        user_cache.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS})
+    return user
+
+
+class RevocationWatch:
+    """Drops users whose tokens another worker revoked from the user cache.
+
+    Requests check tokens against the cached user's ``tokens_valid_after``. At
+    most once per ``check_interval`` seconds a request reads the users whose
+    cutoff moved since the newest one seen, through the index on that column,
+    and invalidates them, so their next request reloads the new cutoff.
+    Steady state costs one indexed probe per interval, which returns no rows.
+    """
+
+    def __init__(self, check_interval: float) -> None:
+        self.check_interval = check_interval
+        # Cutoffs from before this worker started are in whatever it loads.
+        self._newest = datetime.utcnow()
+        self._checked_at = 0.0
+        # Cutoffs already handled within the overlap, so each is invalidated once.
+        self._handled: Dict[int, datetime] = {}
+        self._counters = {"checks": 0, "invalidated": 0}
+
+    def check(self, db: Session) -> None:
+        # No lock, as in SettingsCache: a concurrent check at worst invalidates a user twice.
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        since = self._newest - REVOCATION_OVERLAP
+        revoked = db.execute(
+            select(User.id, User.tokens_valid_after).where(User.tokens_valid_after > since)
+        ).all()
+        handled = {user_id: cutoff for user_id, cutoff in self._handled.items() if cutoff > since}
+        for user_id, cutoff in revoked:
+            if handled.get(user_id) != cutoff:
+                user_cache.invalidate(user_id)
+                self._counters["invalidated"] += 1
+            handled[user_id] = cutoff
+        self._handled = handled
+        self._newest = max([self._newest, *(cutoff for _, cutoff in revoked)])
+        self._counters["checks"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"handled": len(self._handled), **self._counters}
+
+
+revocation_watch = RevocationWatch(check_interval=settings.token_revocation_check_interval)
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> None:
+    """Reject every token issued to ``user_id`` so far, for logout or a changed account.
+
+    Takes effect at once in this worker and within
+    ``TOKEN_REVOCATION_CHECK_INTERVAL`` seconds in the others, whose
+    ``revocation_watch`` then drops the user from their cache.
+    """
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tokens_valid_after=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    invalidate_user(user_id)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.invalidate(user_id)
+
+
+def invalidate_users(user_ids: Iterable[int]) -> None:
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
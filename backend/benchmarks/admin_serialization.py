@@ -0,0 +1,104 @@
+"""Serialization cost of the admin list endpoints, model path versus fast path.
+
+For each page size, fetches the same page of ``/api/admin/results`` and
+``/api/admin/images`` rows and times two ways of turning it into a body:
+``model`` reproduces the previous path (a Pydantic model per row, then
+FastAPI's ``response_model`` validation and JSON rendering), ``fast`` is the
+current one (plain row dicts encoded with orjson). The query time is reported
+alongside, and ``identical`` confirms both bodies decode to the same JSON.
+
+    python -m benchmarks.admin_serialization --sizes 100,1000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import bootstrap, emit, seed_images, seed_sessions, seed_users, summarize
+
+
+def _time(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def _model_body(route, schema, rows: List[dict]) -> bytes:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    models = [schema(**row) for row in rows]
+    content = asyncio.run(serialize_response(field=route.response_field, response_content=models))
+    return JSONResponse(content).body
+
+
+def _compare(name: str, route, schema, fetch: Callable[[], List[dict]], repeat: int) -> Dict[str, object]:
+    from app.api.routes.admin import _page_response
+
+    rows = fetch()
+    model_body = _model_body(route, schema, rows)
+    fast_body = _page_response(rows, None).body
+    return {
+        "endpoint": name,
+        "rows": len(rows),
+        "bytes": len(fast_body),
+        "identical": json.loads(model_body) == json.loads(fast_body),
+        "query": _time(fetch, repeat),
+        "model": _time(lambda: _model_body(route, schema, rows), repeat),
+        "fast": _time(lambda: _page_response(rows, None).body, repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000", help="comma separated page sizes")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    sizes = [int(value) for value in args.sizes.split(",")]
+
+    bootstrap()
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.schemas import ImageRead, SessionResult
+    from app.services.images import list_images_page
+    from app.services.results import ResultFilters, list_results_page
+
+    migrate()
+    db = SessionLocal()
+    seed_images(db, correct=max(sizes), incorrect=max(sizes))
+    seed_sessions(db, max(sizes) * 2, seed_users(db, max(sizes)), open_every=10)
+    routes = {route.path: route for route in app.routes if getattr(route, "methods", None) == {"GET"}}
+
+    runs = []
+    for size in sizes:
+        runs.append(
+            _compare(
+                "results",
+                routes["/api/admin/results"],
+                SessionResult,
+                lambda: list_results_page(db, ResultFilters(), limit=size)[0],
+                args.repeat,
+            )
+        )
+        runs.append(
+            _compare(
+                "images",
+                routes["/api/admin/images"],
+                ImageRead,
+                lambda: list_images_page(db, limit=size)[0],
+                args.repeat,
+            )
+        )
+    db.close()
+    emit({"benchmark": "admin_serialization", "runs": runs})
+
+
+if __name__ == "__main__":
+    main()
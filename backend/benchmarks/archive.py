@@ -0,0 +1,185 @@
+"""Hot-path reads before and after archiving finished sessions.
+
+Seeds ``--history`` submitted sessions from last year with full question sets
+(``--questions`` questions of ``--options`` options each) plus ``--open``
+sessions in progress, then times the reads that run against quiz_sessions:
+the active-session check done by login and quiz requests, the first and a
+deep page of admin results, and the CSV export. It then archives everything
+older than a day, reporting the job's throughput, and times the same reads
+again. ``table_kib`` shows the space each session table takes before and
+after, the question tables' rows against their packed copies.
+
+    python -m benchmarks.archive --history 20000 --batch-size 500
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import bootstrap, emit, seed_sessions, seed_users, summarize
+
+
+def _seed_questions(db, questions: int, options: int) -> None:
+    """Give every seeded session a question set."""
+    from sqlalchemy import func, insert, select
+
+    from app.models import QuizQuestion, QuizQuestionOption, QuizSession
+
+    session_ids = list(db.scalars(select(QuizSession.id).order_by(QuizSession.id)))
+    question_id = db.scalar(select(func.max(QuizQuestion.id))) or 0
+    for offset in range(0, len(session_ids), 1000):
+        question_rows: List[Dict[str, Any]] = []
+        rows: List[Dict[str, Any]] = []
+        for session_id in session_ids[offset : offset + 1000]:
+            for position in range(questions):
+                question_id += 1
+                image_ids = [(session_id * 7 + position * options + option) % 5000 + 1 for option in range(options)]
+                question_rows.append(
+                    {
+                        "id": question_id,
+                        "session_id": session_id,
+                        "position": position,
+                        "public_id": str(uuid.uuid4()),
+                        "answer_image_id": image_ids[0],
+                        "selected_image_id": image_ids[position % options],
+                    }
+                )
+                rows.extend(
+                    {"question_id": question_id, "position": index, "image_id": image_id}
+                    for index, image_id in enumerate(image_ids)
+                )
+        db.execute(insert(QuizQuestion), question_rows)
+        db.execute(insert(QuizQuestionOption), rows)
+    db.commit()
+
+
+def _open_sessions(db, user_ids: List[int]) -> None:
+    from sqlalchemy import insert
+
+    from app.models import QuizSession
+
+    now = datetime.utcnow()
+    db.execute(
+        insert(QuizSession),
+        [{"user_id": user_id, "created_at": now, "expires_at": now + timedelta(minutes=90)} for user_id in user_ids],
+    )
+    db.commit()
+
+
+def _timed(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    function()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def _table_kib(db) -> Dict[str, float]:
+    """Pages in use by each session table and its indexes (SQLite's dbstat)."""
+    from sqlalchemy import text
+
+    rows = db.execute(
+        text(
+            "SELECT s.tbl_name, sum(d.pgsize) FROM dbstat AS d JOIN sqlite_schema AS s ON s.name = d.name "
+            "WHERE s.tbl_name IN ('quiz_sessions', 'quiz_questions', 'quiz_question_options', 'quiz_sessions_archive') "
+            "GROUP BY s.tbl_name"
+        )
+    )
+    return {table: round(size / 1024, 1) for table, size in rows}
+
+
+def _measure_reads(db, user_ids: List[int], repeat: int) -> Dict[str, Any]:
+    from sqlalchemy import func, select
+
+    from app.models import ArchivedSession, QuizQuestion, QuizQuestionOption, QuizSession
+    from app.services.quiz import open_session_clause
+    from app.services.results import ResultFilters, list_results_page
+
+    lookups = iter(range(10**9))
+
+    def active_session() -> object:
+        user_id = user_ids[next(lookups) % len(user_ids)]
+        return db.scalar(
+            select(QuizSession.id).where(QuizSession.user_id == user_id, open_session_clause(datetime.utcnow())).limit(1)
+        )
+
+    _, deep_cursor = list_results_page(db, ResultFilters(), limit=1000)
+    for _ in range(4):
+        _, deep_cursor = list_results_page(db, ResultFilters(), cursor=deep_cursor, limit=1000)
+    reads = {
+        "hot_sessions": db.scalar(select(func.count(QuizSession.id))),
+        "hot_question_rows": db.scalar(select(func.count(QuizQuestion.id)))
+        + db.scalar(select(func.count(QuizQuestionOption.id))),
+        "archived_sessions": db.scalar(select(func.count(ArchivedSession.id))),
+        "table_kib": _table_kib(db),
+        "active_session_check": _timed(active_session, repeat * 10),
+        "results_first_page": _timed(lambda: list_results_page(db, ResultFilters(), limit=100), repeat),
+        "results_page_5000": _timed(lambda: list_results_page(db, ResultFilters(), cursor=deep_cursor, limit=100), repeat),
+        "results_by_employee": _timed(
+            lambda: list_results_page(db, ResultFilters(employee_id="bench-3"), limit=100), repeat
+        ),
+    }
+    db.rollback()
+    return reads
+
+
+def _measure_csv() -> Dict[str, float]:
+    from app.services.results import iter_results_csv
+
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in iter_results_csv())
+    return {"total_ms": round((time.perf_counter() - started) * 1000, 3), "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=20000, help="submitted sessions to seed")
+    parser.add_argument("--open", type=int, default=200, help="sessions in progress")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--options", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bootstrap()
+    from sqlalchemy import func, select
+
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.models import ArchivedSession
+    from app.services.archive import archive_sessions
+
+    migrate()
+    db = SessionLocal()
+    user_ids = seed_users(db, 1000)
+    seed_sessions(db, args.history, user_ids)
+    _seed_questions(db, args.questions, args.options)
+    _open_sessions(db, user_ids[: args.open])
+
+    report: Dict[str, Any] = {"benchmark": "archive", "history": args.history, "open": args.open}
+    report["before"] = {**_measure_reads(db, user_ids, args.repeat), "csv": _measure_csv()}
+
+    started = time.perf_counter()
+    batches = list(archive_sessions(datetime.utcnow() - timedelta(days=1), args.batch_size))
+    elapsed = time.perf_counter() - started
+    archived = sum(batches)
+    packed = db.scalar(select(func.sum(func.length(ArchivedSession.question_set))))
+    report["archive_job"] = {
+        "archived": archived,
+        "batches": len(batches),
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(archived / elapsed) if elapsed else None,
+        "packed_bytes_per_session": round(packed / archived, 1) if archived else None,
+    }
+    report["after"] = {**_measure_reads(db, user_ids, args.repeat), "csv": _measure_csv()}
+    db.close()
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
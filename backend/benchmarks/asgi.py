@@ -0,0 +1,74 @@
+"""HTTP helpers for the benchmarks that drive the application end to end.
+
+``app_client`` migrates the benchmark database and serves the app in-process
+through an ASGI transport, lifespan included, unless a URL of a separately
+started server is given. ``bootstrap``
+must have been called first, as for every other benchmark.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from collections import Counter, defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import summarize
+
+
+class Recorder:
+    """Collects latency samples and status codes per endpoint."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, method: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+        endpoint = f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+        except Exception as exc:  # noqa: BLE001 - every failure is part of the report
+            self.statuses[endpoint][type(exc).__name__] += 1
+            return None
+        self.samples[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            endpoint: {
+                "requests": sum(self.statuses[endpoint].values()),
+                "statuses": dict(self.statuses[endpoint]),
+                "requests_per_s": round(len(samples) / elapsed, 1) if elapsed else None,
+                "latency": summarize(samples),
+            }
+            for endpoint, samples in sorted(self.samples.items())
+        }
+
+
+@contextlib.asynccontextmanager
+async def app_client(url: Optional[str] = None) -> AsyncIterator[httpx.AsyncClient]:
+    timeout = httpx.Timeout(120.0)
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    from app.db.migrations import migrate
+
+    migrate()
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            yield client
+
+
+async def admin_headers(client: httpx.AsyncClient, username: str, password: str) -> Dict[str, str]:
+    response = await client.post("/api/admin/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
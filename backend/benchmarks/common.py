@@ -0,0 +1,94 @@
+"""Helpers shared by the offline benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database. ``bootstrap`` must be called
+before anything under ``app`` is imported, because the application reads its
+configuration at import time.
+"""
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+
+def bootstrap(**env: str) -> str:
+    workdir = tempfile.mkdtemp(prefix="quiz-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    for key, value in env.items():
+        os.environ[key] = value
+    return workdir
+
+
+def seed_images(db, correct: int, incorrect: int) -> None:
+    from app.models import Image, ImageType
+
+    db.bulk_insert_mappings(
+        Image,
+        [{"file_url": f"https://img.example.com/c/{i}.png", "type": ImageType.CORRECT} for i in range(correct)]
+        + [{"file_url": f"https://img.example.com/i/{i}.png", "type": ImageType.INCORRECT} for i in range(incorrect)],
+    )
+    db.commit()
+
+
+def seed_users(db, count: int, prefix: str = "bench") -> List[int]:
+    from app.models import User
+
+    users = [User(employee_id=f"{prefix}-{i}", name=f"{prefix} {i}") for i in range(count)]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def seed_sessions(db, total: int, user_ids: List[int], open_every: int = 0) -> None:
+    """Insert ``total`` quiz sessions, one second apart; every ``open_every``-th one is left unsubmitted."""
+    from sqlalchemy import insert
+
+    from app.models import QuizSession
+
+    started = datetime(2024, 1, 1)
+    for offset in range(0, total, 10_000):
+        rows = []
+        for index in range(offset, min(total, offset + 10_000)):
+            submitted = not (open_every and index % open_every == 0)
+            rows.append(
+                {
+                    "user_id": user_ids[index % len(user_ids)],
+                    "score": index % 101 if submitted else None,
+                    "passed": submitted and index % 101 >= 70,
+                    "created_at": started + timedelta(seconds=index),
+                    "submitted_at": started + timedelta(seconds=index + 60) if submitted else None,
+                    # Open sessions from the past are abandoned ones the reaper has yet to expire.
+                    "expires_at": None if submitted else started + timedelta(seconds=index, minutes=90),
+                    "is_retest": index % 7 == 0,
+                }
+            )
+        db.execute(insert(QuizSession), rows)
+    db.commit()
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def emit(report: Dict[str, Any]) -> None:
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False, default=str)
+    sys.stdout.write("\n")
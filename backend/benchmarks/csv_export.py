@@ -0,0 +1,104 @@
+"""Peak memory and time-to-first-byte of the results CSV export.
+
+Seeds increasing numbers of quiz sessions and drains the export generator while
+tracing Python allocations. The streaming export should show a flat peak; the
+``buffered`` baseline reproduces the previous load-everything implementation.
+
+    python -m benchmarks.csv_export --sizes 1000,10000,100000
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator
+
+from benchmarks.common import bootstrap, emit, seed_sessions, seed_users
+
+
+def _buffered_export() -> Iterator[bytes]:
+    from app.db.session import SessionLocal
+    from app.models import QuizSession, User
+
+    db = SessionLocal()
+    sessions = (
+        db.query(QuizSession, User)
+        .join(User, QuizSession.user_id == User.id)
+        .order_by(QuizSession.created_at.desc())
+        .all()
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for session, user in sessions:
+        writer.writerow(
+            [
+                user.employee_id,
+                user.name,
+                session.score if session.score is not None else "",
+                "합격" if session.passed else "불합격",
+                session.created_at.isoformat(),
+                "Y" if session.is_retest else "N",
+            ]
+        )
+    db.close()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _measure(export: Callable[[], Iterator[bytes]]) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in export():
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_kib": round(peak / 1024, 1),
+        "first_byte_ms": round((first_byte or 0) * 1000, 3),
+        "total_ms": round(elapsed * 1000, 3),
+        "bytes": size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated session counts")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--skip-buffered", action="store_true", help="only measure the streaming export")
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.services.results import iter_results_csv
+
+    migrate()
+    db = SessionLocal()
+    user_ids = seed_users(db, args.users)
+
+    levels = []
+    seeded = 0
+    for size in sorted(int(value) for value in args.sizes.split(",")):
+        seed_sessions(db, size - seeded, user_ids)
+        seeded = size
+        level = {
+            "sessions": size,
+            "streaming": _measure(iter_results_csv),
+            "streaming_gzip": _measure(lambda: iter_results_csv(compress=True)),
+        }
+        if not args.skip_buffered:
+            level["buffered"] = _measure(_buffered_export)
+        levels.append(level)
+    db.close()
+
+    emit({"benchmark": "csv_export", "levels": levels})
+
+
+if __name__ == "__main__":
+    main()
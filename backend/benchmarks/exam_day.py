@@ -0,0 +1,178 @@
+"""End-to-end load test of the exam-day flow.
+
+Drives the real FastAPI application through ``/api/login`` -> ``/api/quiz`` ->
+``/api/quiz/submit`` for ``--employees`` synthetic employees, ``--concurrency``
+at a time, while ``--admin-readers`` admins keep polling the results page,
+the results summary and the CSV export. Images are seeded through the bulk
+ingest endpoint, so the same script can target a running server.
+
+By default the app runs in-process behind an ASGI transport with a throwaway
+SQLite database; ``--url`` points the load at a server started separately
+(e.g. ``uvicorn app.main:app --workers 4``). The JSON report has throughput
+and p50/p95/p99 per endpoint, the cold start time of a fresh worker (import,
+lifespan startup, first request), the per-request authentication cost and
+the git revision, so runs can be compared across commits.
+
+    python -m benchmarks.exam_day --employees 200 --concurrency 50
+    python -m benchmarks.exam_day --employees 200 --concurrency 50 --async-db
+    python -m benchmarks.exam_day --url http://127.0.0.1:8000 --employees 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import subprocess
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+
+from benchmarks.asgi import Recorder, admin_headers, app_client
+from benchmarks.auth import measure as measure_auth
+from benchmarks.common import bootstrap, emit
+from benchmarks.startup import measure as measure_startup
+
+
+async def _seed_images(client: httpx.AsyncClient, headers: Dict[str, str], employees: int) -> Dict[str, Any]:
+    response = await client.get("/api/admin/settings", headers=headers)
+    response.raise_for_status()
+    setting = response.json()
+    correct = employees * setting["num_questions"]
+    incorrect = correct * (setting["num_options"] - 1)
+    run = uuid.uuid4().hex[:8]
+    lines = [
+        json.dumps({"file_url": f"https://img.example.com/{run}/{kind}/{index}.png", "type": kind})
+        for kind, count in (("correct", correct), ("incorrect", incorrect))
+        for index in range(count)
+    ]
+    response = await client.post(
+        "/api/admin/images/bulk",
+        content="\n".join(lines).encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _employee(client: httpx.AsyncClient, recorder: Recorder, employee_id: str) -> bool:
+    response = await recorder.request(client, "POST", "/api/login", json={"employee_id": employee_id, "name": "Bench"})
+    if response is None or response.status_code != 200:
+        return False
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await recorder.request(client, "GET", "/api/quiz", headers=headers)
+    if response is None or response.status_code != 200:
+        return False
+    quiz = response.json()
+    answers = [
+        {"question_id": question["question_id"], "selected_image_id": random.choice(question["options"])["image_id"]}
+        for question in quiz["questions"]
+    ]
+
+    response = await recorder.request(
+        client, "POST", "/api/quiz/submit", json={"session_id": quiz["session_id"], "answers": answers}, headers=headers
+    )
+    return response is not None and response.status_code == 200
+
+
+async def _admin_reader(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    headers: Dict[str, str],
+    done: asyncio.Event,
+    interval: float,
+    csv_every: int,
+) -> None:
+    rounds = 0
+    while not done.is_set():
+        await recorder.request(client, "GET", "/api/admin/results", params={"limit": 100}, headers=headers)
+        await recorder.request(client, "GET", "/api/admin/results/stats", headers=headers)
+        rounds += 1
+        if csv_every and rounds % csv_every == 0:
+            await recorder.request(client, "GET", "/api/admin/results/csv", headers=headers)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(done.wait(), interval)
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = Recorder()
+    async with app_client(args.url) as client:
+        admin = await admin_headers(client, args.admin_username, args.admin_password)
+        seeded = await _seed_images(client, admin, args.employees)
+
+        prefix = uuid.uuid4().hex[:8]
+        pending: asyncio.Queue = asyncio.Queue()
+        for index in range(args.employees):
+            pending.put_nowait(f"bench-{prefix}-{index}")
+        completed = 0
+
+        async def worker() -> None:
+            nonlocal completed
+            while not pending.empty():
+                if await _employee(client, recorder, pending.get_nowait()):
+                    completed += 1
+
+        done = asyncio.Event()
+        readers = [
+            asyncio.create_task(_admin_reader(client, recorder, admin, done, args.admin_interval, args.csv_every))
+            for _ in range(args.admin_readers)
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*readers)
+
+    return {
+        "employees": args.employees,
+        "completed_flows": completed,
+        "elapsed_s": round(elapsed, 3),
+        "flows_per_s": round(completed / elapsed, 1) if elapsed else None,
+        "images_seeded": seeded["inserted"],
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="employees in flight at once")
+    parser.add_argument("--admin-readers", type=int, default=2, help="admins polling results during the run")
+    parser.add_argument("--admin-interval", type=float, default=0.5, help="seconds between an admin's polls")
+    parser.add_argument("--csv-every", type=int, default=5, help="export the CSV every N admin polls (0 disables)")
+    parser.add_argument("--async-db", action="store_true", help="run the in-process app with DB_ASYNC=1")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    if not args.url:
+        bootstrap(DB_ASYNC="1" if args.async_db else "0")
+    report = {
+        "benchmark": "exam_day",
+        "revision": _git_revision(),
+        "target": args.url or ("in-process, async db" if args.async_db else "in-process, sync db"),
+        "concurrency": args.concurrency,
+        "admin_readers": args.admin_readers,
+        **asyncio.run(_run(args)),
+    }
+    if not args.url:
+        # Cold start of a fresh worker against the database the run just filled.
+        report["startup"] = measure_startup()
+        report["auth"] = measure_auth()
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Login storm: first logins versus logins of a pre-imported roster.
+
+Fires ``--employees`` logins, ``--concurrency`` at a time, in two phases.
+``first_login`` employees have no account yet, and each logs in ``--repeat``
+times at once, so accounts are created under contention. ``preloaded``
+employees are registered first through ``POST /api/admin/users/bulk``, so
+every login is a read. In-process runs also count the accounts each phase
+ended with, which must equal the number of employees.
+
+    python -m benchmarks.login_storm --employees 1000 --concurrency 100
+    python -m benchmarks.login_storm --employees 1000 --concurrency 100 --async-db
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.asgi import Recorder, admin_headers, app_client
+from benchmarks.common import bootstrap, emit
+
+
+def _count_accounts(prefix: str) -> Optional[int]:
+    from app.db.session import SessionLocal
+    from app.models import User
+
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.employee_id.like(f"{prefix}-%")).count()
+    finally:
+        db.close()
+
+
+async def _storm(client: httpx.AsyncClient, employee_ids: List[str], concurrency: int) -> Dict[str, Any]:
+    recorder = Recorder()
+    pending: asyncio.Queue = asyncio.Queue()
+    for employee_id in employee_ids:
+        pending.put_nowait(employee_id)
+
+    async def worker() -> None:
+        while not pending.empty():
+            employee_id = pending.get_nowait()
+            await recorder.request(client, "POST", "/api/login", json={"employee_id": employee_id, "name": "Bench"})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"logins": len(employee_ids), "elapsed_s": round(elapsed, 3), **recorder.report(elapsed)}
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    run = uuid.uuid4().hex[:8]
+    phases: Dict[str, Any] = {}
+    async with app_client(args.url) as client:
+        admin = await admin_headers(client, args.admin_username, args.admin_password)
+
+        prefix = f"storm-{run}-first"
+        employee_ids = [f"{prefix}-{index}" for index in range(args.employees) for _ in range(args.repeat)]
+        random.shuffle(employee_ids)
+        phases["first_login"] = await _storm(client, employee_ids, args.concurrency)
+        if not args.url:
+            phases["first_login"]["accounts"] = _count_accounts(prefix)
+
+        prefix = f"storm-{run}-preloaded"
+        roster = "\n".join(json.dumps({"employee_id": f"{prefix}-{index}", "name": "Bench"}) for index in range(args.employees))
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/admin/users/bulk",
+            content=roster.encode(),
+            headers={**admin, "Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        import_s = round(time.perf_counter() - started, 3)
+        employee_ids = [f"{prefix}-{index}" for index in range(args.employees) for _ in range(args.repeat)]
+        random.shuffle(employee_ids)
+        phases["preloaded"] = {
+            "roster_import_s": import_s,
+            "roster_import": response.json(),
+            **await _storm(client, employee_ids, args.concurrency),
+        }
+        if not args.url:
+            phases["preloaded"]["accounts"] = _count_accounts(prefix)
+    return phases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100, help="logins in flight at once")
+    parser.add_argument("--repeat", type=int, default=2, help="simultaneous logins per employee")
+    parser.add_argument("--async-db", action="store_true", help="run the in-process app with DB_ASYNC=1")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    if not args.url:
+        bootstrap(DB_ASYNC="1" if args.async_db else "0")
+    report = {
+        "benchmark": "login_storm",
+        "target": args.url or ("in-process, async db" if args.async_db else "in-process, sync db"),
+        "employees": args.employees,
+        "concurrency": args.concurrency,
+        **asyncio.run(_run(args)),
+    }
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""A burst of quiz requests from impatient clients, with and without admission control.
+
+Every one of ``--employees`` logged-in employees asks for a quiz at the same
+moment. Clients behave like the exam frontend: a request that takes longer
+than ``--client-timeout`` is abandoned and sent again at once, and a 503 or
+429 is retried after its ``Retry-After``. Employees blocked with 409 by a
+quiz an abandoned request created are reported as ``orphaned``, and those
+still without a quiz after ``--deadline`` seconds as ``unserved``.
+
+Abandoned requests keep running on the server; ``abandoned_drain_s`` is how
+long that leftover work took to finish. If it has not finished
+``--drain-timeout`` seconds after the burst, the server is reported as wedged
+(``abandoned_pending``). Run it once with the default limits and once with
+``--no-admission`` to compare.
+
+    python -m benchmarks.quiz_burst --employees 400
+    python -m benchmarks.quiz_burst --employees 400 --no-admission
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.asgi import admin_headers, app_client
+from benchmarks.common import bootstrap, emit, seed_images, summarize
+
+MAX_RETRY_SLEEP = 5.0
+
+
+async def _employee(
+    client: httpx.AsyncClient,
+    employee_id: str,
+    args: argparse.Namespace,
+    deadline: float,
+    outcome: Counter,
+    latencies: List[float],
+    abandoned: List[asyncio.Task],
+) -> None:
+    response = await client.post("/api/login", json={"employee_id": employee_id, "name": "Bench"})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    while True:
+        if time.perf_counter() > deadline:
+            outcome["unserved"] += 1
+            return
+        outcome["attempts"] += 1
+        started = time.perf_counter()
+        # The request is abandoned, not cancelled: a server keeps working on it regardless.
+        request = asyncio.ensure_future(client.get("/api/quiz", headers=headers))
+        done, _ = await asyncio.wait({request}, timeout=args.client_timeout)
+        if not done:
+            outcome["client_timeouts"] += 1
+            abandoned.append(request)
+            continue
+        response = request.result()
+        outcome[str(response.status_code)] += 1
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+            outcome["served"] += 1
+            return
+        if response.status_code == 409:
+            outcome["orphaned"] += 1
+            return
+        if response.status_code in (429, 503):
+            await asyncio.sleep(min(MAX_RETRY_SLEEP, float(response.headers.get("Retry-After", "1"))))
+            continue
+        response.raise_for_status()
+
+
+async def _run(args: argparse.Namespace, report: Dict[str, Any]) -> None:
+    outcome: Counter = Counter()
+    latencies: List[float] = []
+    abandoned: List[asyncio.Task] = []
+    async with app_client() as client:
+        admin = await admin_headers(client, args.admin_username, args.admin_password)
+        prefix = uuid.uuid4().hex[:8]
+        started = time.perf_counter()
+        deadline = started + args.deadline
+        await asyncio.gather(
+            *(
+                _employee(client, f"burst-{prefix}-{index}", args, deadline, outcome, latencies, abandoned)
+                for index in range(args.employees)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        report.update(
+            elapsed_s=round(elapsed, 3),
+            outcome=dict(sorted(outcome.items())),
+            served_latency=summarize(latencies),
+        )
+        # Abandoned requests still occupy the server; wait for them before reading its stats.
+        pending = set()
+        if abandoned:
+            _, pending = await asyncio.wait(abandoned, timeout=args.drain_timeout)
+        if pending:
+            # The threadpool is wedged on pool checkouts that only its own queued
+            # teardowns would free. Report that and stop, rather than wait it out
+            # or cancel requests mid-query on the way out.
+            report["abandoned_pending"] = len(pending)
+            emit(report)
+            sys.stdout.flush()
+            os._exit(1)
+        report["abandoned_drain_s"] = round(time.perf_counter() - started - elapsed, 3)
+        report["admission_stats"] = (await client.get("/api/admin/runtime", headers=admin)).json()["admission"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=400)
+    parser.add_argument("--client-timeout", type=float, default=5.0, help="seconds before a client gives up and retries")
+    parser.add_argument("--deadline", type=float, default=60.0, help="seconds before remaining employees give up")
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="seconds to wait for abandoned requests")
+    parser.add_argument("--no-admission", action="store_true", help="lift the concurrency and rate limits")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    limits = {"ADMISSION_QUIZ_CONCURRENCY": "0", "USER_RATE_LIMIT": "0"} if args.no_admission else {}
+    bootstrap(**limits)
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.services.quiz import get_active_settings
+
+    migrate()
+    db = SessionLocal()
+    quiz_settings = get_active_settings(db)
+    correct = args.employees * quiz_settings.num_questions
+    seed_images(db, correct=correct, incorrect=correct * (quiz_settings.num_options - 1))
+    db.close()
+
+    report: Dict[str, Any] = {
+        "benchmark": "quiz_burst",
+        "admission": not args.no_admission,
+        "employees": args.employees,
+        "client_timeout_s": args.client_timeout,
+    }
+    asyncio.run(_run(args, report))
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Size and serialization cost of the full versus compact quiz response.
+
+Builds ``--quizzes`` question sets with the current settings, then times how
+long ``GET /api/quiz`` takes to turn each one into a response body: building
+the response model, FastAPI's response validation and JSON rendering. Sizes
+are reported raw and gzipped at the configured level, next to the one-off
+cost of the image catalog that compact clients fetch and cache.
+
+    python -m benchmarks.quiz_payload --quizzes 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import time
+from typing import Dict, List
+
+from benchmarks.common import bootstrap, emit, seed_images, summarize
+
+
+def _measure(route, question_sets: List[List[dict]], compact: bool, level: int) -> Dict[str, object]:
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    from app.api.routes.quiz import _quiz_response
+
+    async def render(session_id: int, question_set: List[dict]) -> bytes:
+        # Mirrors FastAPI: a returned Response is sent as is, anything else is
+        # validated against the route's response model and rendered as JSON.
+        result = _quiz_response(session_id, question_set, compact)
+        if isinstance(result, Response):
+            return result.body
+        return JSONResponse(await serialize_response(field=route.response_field, response_content=result)).body
+
+    async def run() -> Dict[str, object]:
+        timings: List[float] = []
+        sizes: List[int] = []
+        compressed: List[int] = []
+        for session_id, question_set in enumerate(question_sets, start=1):
+            started = time.perf_counter()
+            body = await render(session_id, question_set)
+            timings.append(time.perf_counter() - started)
+            sizes.append(len(body))
+            compressed.append(len(gzip.compress(body, compresslevel=level)))
+        return {
+            "response": "compact" if compact else "full",
+            "bytes": round(sum(sizes) / len(sizes)),
+            "gzip_bytes": round(sum(compressed) / len(compressed)),
+            "serialize": summarize(timings),
+        }
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, default=200)
+    parser.add_argument("--catalog-images", type=int, default=20000, help="images in the catalog beyond those drawn")
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.core.config import get_settings
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.services.image_catalog import image_catalog
+    from app.services.quiz import build_question_set, get_active_settings
+
+    migrate()
+    settings = get_settings()
+    db = SessionLocal()
+    quiz_settings = get_active_settings(db)
+    correct = args.quizzes * quiz_settings.num_questions + args.catalog_images // quiz_settings.num_options
+    seed_images(db, correct=correct, incorrect=correct * (quiz_settings.num_options - 1))
+    question_sets = [build_question_set(db, quiz_settings) for _ in range(args.quizzes)]
+    db.rollback()
+
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/api/quiz")
+    image_catalog.invalidate()
+    started = time.perf_counter()
+    catalog = image_catalog.refresh()
+    catalog_load = time.perf_counter() - started
+    db.close()
+    runs = [_measure(route, question_sets, compact, settings.gzip_compresslevel) for compact in (False, True)]
+
+    emit(
+        {
+            "benchmark": "quiz_payload",
+            "questions": quiz_settings.num_questions,
+            "options": quiz_settings.num_options,
+            "runs": runs,
+            "catalog": {
+                "images": len(catalog.urls),
+                "bytes": len(catalog.body),
+                "gzip_bytes": len(gzip.compress(catalog.body, compresslevel=settings.gzip_compresslevel)),
+                "load_ms": round(catalog_load * 1000, 3),
+            },
+        }
+    )
+
+
+if __name__ == "__main__":
+    main()
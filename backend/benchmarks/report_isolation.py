@@ -0,0 +1,138 @@
+"""Exam latency while admins export results, with and without the reporting pool.
+
+Seeds ``--history`` past sessions, then keeps ``--concurrency`` employees
+going through login -> quiz -> submit for ``--duration`` seconds, twice:
+alone, then while ``--exports`` admins download the results CSV back to back
+and page through results. Exam latency per endpoint is reported for both
+phases. Run it once as is, where reports read through their own pool, and
+once with ``--shared-pool`` (``REPORT_POOL_SIZE=0``), where they take
+connections from the exam pool. ``--pool-size`` sets the exam pool (no
+overflow), as a database server's connection limit would.
+
+    python -m benchmarks.report_isolation --history 200000 --exports 4
+    python -m benchmarks.report_isolation --history 200000 --exports 4 --shared-pool
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.asgi import Recorder, admin_headers, app_client
+from benchmarks.common import bootstrap, emit, seed_images, seed_sessions, seed_users
+
+# Exam endpoints are reported per phase; report endpoints only as totals.
+EXAM_ENDPOINTS = ("POST /api/login", "GET /api/quiz", "POST /api/quiz/submit")
+
+
+async def _employees(client: httpx.AsyncClient, recorder: Recorder, ids: "itertools.count[int]", until: float) -> None:
+    prefix = uuid.uuid4().hex[:8]
+    while time.perf_counter() < until:
+        employee = f"iso-{prefix}-{next(ids)}"
+        response = await recorder.request(client, "POST", "/api/login", json={"employee_id": employee, "name": "Bench"})
+        if response is None or response.status_code != 200:
+            continue
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await recorder.request(client, "GET", "/api/quiz", headers=headers)
+        if response is None or response.status_code != 200:
+            await asyncio.sleep(0.05)
+            continue
+        quiz = response.json()
+        answers = [
+            {"question_id": question["question_id"], "selected_image_id": random.choice(question["options"])["image_id"]}
+            for question in quiz["questions"]
+        ]
+        await recorder.request(
+            client, "POST", "/api/quiz/submit", json={"session_id": quiz["session_id"], "answers": answers}, headers=headers
+        )
+
+
+async def _admin(client: httpx.AsyncClient, headers: Dict[str, str], until: float, report: Dict[str, Any]) -> None:
+    while time.perf_counter() < until:
+        started = time.perf_counter()
+        async with client.stream("GET", "/api/admin/results/csv", headers=headers) as response:
+            size = sum([len(chunk) async for chunk in response.aiter_bytes()])
+        report["exports"] += 1
+        report["export_s"].append(time.perf_counter() - started)
+        report["export_bytes"] = size
+        report["data_as_of_header"] = "x-data-as-of" in response.headers
+        response = await client.get("/api/admin/results", params={"limit": 500}, headers=headers)
+        response.raise_for_status()
+
+
+async def _phase(client: httpx.AsyncClient, args: argparse.Namespace, admin: Dict[str, str], exports: int) -> Dict[str, Any]:
+    recorder = Recorder()
+    ids = itertools.count()
+    admin_report: Dict[str, Any] = {"exports": 0, "export_s": []}
+    until = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(_employees(client, recorder, ids, until) for _ in range(args.concurrency)),
+        *(_admin(client, admin, until, admin_report) for _ in range(exports)),
+    )
+    elapsed = time.perf_counter() - started
+    exam = recorder.report(elapsed)
+    phase: Dict[str, Any] = {"exam": {endpoint: exam[endpoint] for endpoint in EXAM_ENDPOINTS if endpoint in exam}}
+    if exports:
+        export_s: List[float] = admin_report.pop("export_s")
+        phase["reports"] = {**admin_report, "mean_export_s": round(sum(export_s) / len(export_s), 3) if export_s else None}
+    return phase
+
+
+async def _run(args: argparse.Namespace, report: Dict[str, Any]) -> None:
+    async with app_client() as client:
+        admin = await admin_headers(client, args.admin_username, args.admin_password)
+        report["exam_only"] = await _phase(client, args, admin, exports=0)
+        report["with_exports"] = await _phase(client, args, admin, exports=args.exports)
+        report["reporting"] = (await client.get("/api/admin/runtime", headers=admin)).json()["reporting"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=200000, help="past sessions in the results")
+    parser.add_argument("--concurrency", type=int, default=16, help="employees taking the exam at once")
+    parser.add_argument("--exports", type=int, default=4, help="admins exporting at once")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    parser.add_argument("--pool-size", type=int, default=10, help="exam connection pool size")
+    parser.add_argument("--shared-pool", action="store_true", help="run reports on the exam pool")
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    env = {"DB_POOL_SIZE": str(args.pool_size), "DB_MAX_OVERFLOW": "0"}
+    if args.shared_pool:
+        env["REPORT_POOL_SIZE"] = "0"
+    bootstrap(**env)
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.services.quiz import get_active_settings
+
+    migrate()
+    db = SessionLocal()
+    quiz_settings = get_active_settings(db)
+    # Submitted sessions hand their images back, so a few quizzes' worth per employee suffice.
+    correct = args.concurrency * 4 * quiz_settings.num_questions
+    seed_images(db, correct=correct, incorrect=correct * (quiz_settings.num_options - 1))
+    seed_sessions(db, args.history, seed_users(db, 1000))
+    db.close()
+
+    report: Dict[str, Any] = {
+        "benchmark": "report_isolation",
+        "reporting_pool": "shared" if args.shared_pool else "separate",
+        "history": args.history,
+        "concurrency": args.concurrency,
+        "exports": args.exports,
+        "pool_size": args.pool_size,
+    }
+    asyncio.run(_run(args, report))
+    emit(report)
+
+
+if __name__ == "__main__":
+    main()
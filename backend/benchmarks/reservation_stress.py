@@ -0,0 +1,128 @@
+"""Concurrency stress test for image reservation.
+
+Runs ``generate_quiz_session`` from many parallel clients against one SQLite
+database and checks that no image is ever handed to two open sessions. In the
+default ``process`` mode every client is a separate process with its own copy of
+the warm image pool, which is exactly what several uvicorn workers look like, so
+most draws collide and have to be resolved by the conditional claim.
+
+    python -m benchmarks.reservation_stress --clients 1,2,4,8,16
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from benchmarks.common import bootstrap, emit, seed_images, seed_users, summarize
+
+
+def _run_client(user_ids: List[int]) -> Tuple[List[Tuple[int, List[int]]], List[float], int]:
+    from fastapi import HTTPException
+
+    from app.db.session import SessionLocal
+    from app.models import User
+    from app.services.quiz import generate_quiz_session
+
+    allocations: List[Tuple[int, List[int]]] = []
+    latencies: List[float] = []
+    rejected = 0
+    db = SessionLocal()
+    try:
+        for user_id in user_ids:
+            user = db.get(User, user_id)
+            started = time.perf_counter()
+            try:
+                session, question_set = generate_quiz_session(db, user)
+            except HTTPException:
+                rejected += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            allocations.append((session.id, [o["image_id"] for q in question_set for o in q["options"]]))
+    finally:
+        db.close()
+    return allocations, latencies, rejected
+
+
+def _run_level(executor_cls, clients: int, user_ids: List[int], per_client: int) -> Dict[str, object]:
+    from app.db.session import SessionLocal, engine
+    from app.models import Image
+    from app.services.image_pool import image_pool
+
+    db = SessionLocal()
+    db.query(Image).update({Image.used_in_session: False})
+    db.commit()
+    image_pool.load(db)
+    db.close()
+    engine.dispose()
+
+    batches = [user_ids[i * per_client : (i + 1) * per_client] for i in range(clients)]
+    kwargs = {"mp_context": multiprocessing.get_context("fork")} if executor_cls is ProcessPoolExecutor else {}
+    started = time.perf_counter()
+    with executor_cls(max_workers=clients, **kwargs) as executor:
+        results = list(executor.map(_run_client, batches))
+    elapsed = time.perf_counter() - started
+
+    allocations = [allocation for result in results for allocation in result[0]]
+    latencies = [latency for result in results for latency in result[1]]
+    usage = Counter(image_id for _, image_ids in allocations for image_id in image_ids)
+    double_allocated = sum(1 for count in usage.values() if count > 1)
+
+    db = SessionLocal()
+    used_in_db = db.query(Image).filter(Image.used_in_session.is_(True)).count()
+    db.close()
+
+    return {
+        "clients": clients,
+        "sessions": len(allocations),
+        "rejected": sum(result[2] for result in results),
+        "double_allocated_images": double_allocated,
+        "images_reserved": len(usage),
+        "images_marked_used": used_in_db,
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(len(allocations) / elapsed, 1) if elapsed else None,
+        "latency": summarize(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,2,4,8,16", help="comma separated parallel client counts")
+    parser.add_argument("--sessions-per-client", type=int, default=5)
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    args = parser.parse_args()
+    levels = [int(value) for value in args.clients.split(",")]
+
+    bootstrap()
+    from app.core.config import get_settings
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+
+    migrate()
+    settings = get_settings()
+    per_level = max(levels) * args.sessions_per_client
+    db = SessionLocal()
+    seed_images(
+        db,
+        correct=per_level * settings.default_num_questions * 2,
+        incorrect=per_level * settings.default_num_questions * (settings.default_num_options - 1) * 2,
+    )
+    user_ids = seed_users(db, per_level)
+    db.close()
+
+    executor_cls = ProcessPoolExecutor if args.mode == "process" else ThreadPoolExecutor
+    report = {
+        "benchmark": "reservation_stress",
+        "mode": args.mode,
+        "levels": [_run_level(executor_cls, clients, user_ids, args.sessions_per_client) for clients in levels],
+    }
+    emit(report)
+    if any(level["double_allocated_images"] for level in report["levels"]):
+        raise SystemExit("double allocation detected")
+
+
+if __name__ == "__main__":
+    main()
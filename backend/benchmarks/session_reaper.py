@@ -0,0 +1,98 @@
+"""Cost of a session reaper sweep as the session history grows.
+
+For each history size, tops the database up with that many submitted
+sessions, opens ``--abandoned`` real quiz sessions (each holding its images),
+moves their leases into the past and times one sweep that expires them all.
+``idle`` times sweeps that find nothing overdue. ``pool_restored`` confirms
+that every image is free again after the sweep.
+
+    python -m benchmarks.session_reaper --history 10000,100000,500000 --abandoned 200
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from benchmarks.common import bootstrap, emit, seed_images, seed_sessions, seed_users, summarize
+
+
+def _abandon_sessions(db, count: int, prefix: str) -> List[int]:
+    from sqlalchemy import update
+
+    from app.models import QuizSession, User
+    from app.services.quiz import generate_quiz_session
+
+    session_ids = []
+    for user_id in seed_users(db, count, prefix=prefix):
+        session, _ = generate_quiz_session(db, db.get(User, user_id))
+        session_ids.append(session.id)
+    db.execute(
+        update(QuizSession)
+        .where(QuizSession.id.in_(session_ids))
+        .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    db.commit()
+    return session_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="10000,100000,500000", help="comma separated submitted session counts")
+    parser.add_argument("--abandoned", type=int, default=200, help="overdue sessions expired by each timed sweep")
+    parser.add_argument("--repeat", type=int, default=20, help="idle sweeps per history size")
+    args = parser.parse_args()
+    sizes = sorted(int(value) for value in args.history.split(","))
+
+    bootstrap()
+    from sqlalchemy import func, select
+
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+    from app.models import Image
+    from app.services.image_pool import warm_image_pool
+    from app.services.quiz import get_active_settings
+    from app.services.session_reaper import SessionReaper
+
+    migrate()
+    db = SessionLocal()
+    quiz_settings = get_active_settings(db)
+    per_session = quiz_settings.num_questions
+    seed_images(db, correct=args.abandoned * per_session, incorrect=args.abandoned * per_session * (quiz_settings.num_options - 1))
+    warm_image_pool()
+    history_users = seed_users(db, 1000)
+    reaper = SessionReaper(batch_size=500)
+
+    runs: List[Dict[str, object]] = []
+    seeded = 0
+    for size in sizes:
+        seed_sessions(db, size - seeded, history_users)
+        seeded = size
+        _abandon_sessions(db, args.abandoned, prefix=f"abandoned-{size}")
+
+        started = time.perf_counter()
+        expired = reaper.sweep()
+        sweep_s = time.perf_counter() - started
+        idle: List[float] = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            reaper.sweep()
+            idle.append(time.perf_counter() - started)
+        in_use = db.scalar(select(func.count(Image.id)).where(Image.used_in_session.is_(True)))
+        db.rollback()
+        runs.append(
+            {
+                "history": size,
+                "expired": expired,
+                "sweep_ms": round(sweep_s * 1000, 3),
+                "idle": summarize(idle),
+                "pool_restored": in_use == 0,
+            }
+        )
+    db.close()
+    emit({"benchmark": "session_reaper", "abandoned": args.abandoned, "runs": runs, "totals": reaper.stats()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Cold start of one application worker: import, lifespan startup, first request.
+
+Every sample starts a fresh interpreter against the benchmark database, as a
+new uvicorn worker would, and reports how long importing ``app.main``, running
+the lifespan startup and serving the first ``/health`` request took. The
+database is migrated beforehand, since workers no longer touch the schema.
+
+    python -m benchmarks.startup --samples 5 --images 50000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import bootstrap, emit, seed_images
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+import httpx
+
+async def probe():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://probe") as client:
+            response = await client.get("/health")
+        response.raise_for_status()
+        served = time.perf_counter()
+    return ready, served
+
+ready, served = asyncio.run(probe())
+print(json.dumps({"import_s": imported - started, "lifespan_s": ready - imported, "first_request_s": served - ready}))
+"""
+
+
+def measure(samples: int = 3) -> Dict[str, float]:
+    """Median of ``samples`` cold starts, in milliseconds per phase."""
+    runs: List[Dict[str, float]] = []
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=BACKEND_DIR,
+            env=dict(os.environ),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    phases = {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}
+    phases["total_s"] = sum(phases.values())
+    return {phase.replace("_s", "_ms"): round(seconds * 1000, 1) for phase, seconds in phases.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--images", type=int, default=10000, help="images seeded before measuring")
+    args = parser.parse_args()
+
+    bootstrap()
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+
+    migrate()
+    db = SessionLocal()
+    seed_images(db, correct=args.images // 10, incorrect=args.images - args.images // 10)
+    db.close()
+    emit({"benchmark": "startup", "samples": args.samples, "images": args.images, "startup": measure(args.samples)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Submit latency with deferred versus inline image release.
+
+Opens one quiz session per user, then submits them all from parallel clients.
+``deferred`` is the current pipeline: the score and a queued release are
+committed together and a background releaser frees the images. ``inline``
+reproduces the previous behaviour, where the request committed the score and
+then freed the images in a second write transaction.
+
+    python -m benchmarks.submit_latency --clients 1,4,8,16
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from benchmarks.common import bootstrap, emit, seed_images, seed_users, summarize
+
+Submission = Tuple[int, int, Dict[str, int]]
+
+
+def _submit_inline(db, user, session_id: int, answers: Dict[str, int]) -> None:
+    from app.models import QuizSession
+    from app.services.image_pool import image_pool
+    from app.services.quiz import release_session_images, evaluate_submission, get_active_settings
+
+    session = db.get(QuizSession, session_id)
+    score, passed = evaluate_submission(db, session, answers, get_active_settings(db).passing_score)
+    session.score = score
+    session.passed = passed
+    session.submitted_at = datetime.utcnow()
+    db.commit()
+    image_pool.release(release_session_images(db, [session_id]))
+    db.commit()
+
+
+def _run_client(mode: str, submissions: List[Submission]) -> List[float]:
+    from app.api.routes.quiz import _submit_quiz
+    from app.db.session import SessionLocal
+    from app.models import User
+    from app.schemas import QuizSubmission
+
+    latencies: List[float] = []
+    db = SessionLocal()
+    try:
+        for user_id, session_id, answers in submissions:
+            user = db.get(User, user_id)
+            started = time.perf_counter()
+            if mode == "inline":
+                _submit_inline(db, user, session_id, answers)
+            else:
+                payload = QuizSubmission(
+                    session_id=session_id,
+                    answers=[{"question_id": key, "selected_image_id": value} for key, value in answers.items()],
+                )
+                _submit_quiz(db, user, payload)
+            latencies.append(time.perf_counter() - started)
+            db.expunge_all()
+    finally:
+        db.close()
+    return latencies
+
+
+def _open_sessions(user_ids: List[int]) -> List[Submission]:
+    from app.db.session import SessionLocal
+    from app.models import Image, QuizQuestion, QuizQuestionOption, User
+    from app.services.image_pool import image_pool
+    from app.services.quiz import generate_quiz_session
+
+    db = SessionLocal()
+    db.query(Image).update({Image.used_in_session: False})
+    db.commit()
+    image_pool.load(db)
+    submissions: List[Submission] = []
+    for user_id in user_ids:
+        session, _ = generate_quiz_session(db, db.get(User, user_id))
+        options: Dict[str, List[int]] = {}
+        rows = db.execute(
+            db.query(QuizQuestion.public_id, QuizQuestionOption.image_id)
+            .join(QuizQuestionOption, QuizQuestionOption.question_id == QuizQuestion.id)
+            .filter(QuizQuestion.session_id == session.id)
+            .statement
+        )
+        for public_id, image_id in rows:
+            options.setdefault(public_id, []).append(image_id)
+        submissions.append((user_id, session.id, {key: random.choice(ids) for key, ids in options.items()}))
+    db.close()
+    return submissions
+
+
+def _run_releaser(stop) -> None:
+    from app.core.config import get_settings
+    from app.services.quiz import release_pending_images
+
+    interval = get_settings().image_release_interval
+    while not stop.is_set():
+        release_pending_images()
+        stop.wait(interval)
+
+
+def _run_level(mode: str, clients: int, user_ids: List[int], per_client: int) -> Dict[str, object]:
+    from app.db.session import SessionLocal, engine
+    from app.models import Image
+    from app.services.quiz import release_pending_images
+
+    submissions = _open_sessions(user_ids)
+    engine.dispose()
+
+    batches = [submissions[i * per_client : (i + 1) * per_client] for i in range(clients)]
+    context = multiprocessing.get_context("fork")
+    # The releaser gets its own process, as it would in another uvicorn worker;
+    # forking clients while a releaser thread holds SQLite locks can deadlock them.
+    stop = context.Event()
+    releaser = context.Process(target=_run_releaser, args=(stop,))
+    if mode == "deferred":
+        releaser.start()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=clients, mp_context=context) as executor:
+        results = list(executor.map(_run_client, [mode] * clients, batches))
+    elapsed = time.perf_counter() - started
+    if mode == "deferred":
+        stop.set()
+        releaser.join()
+    release_pending_images()
+
+    db = SessionLocal()
+    still_used = db.query(Image).filter(Image.used_in_session.is_(True)).count()
+    db.close()
+
+    latencies = [latency for result in results for latency in result]
+    return {
+        "mode": mode,
+        "clients": clients,
+        "submissions": len(latencies),
+        "images_left_used": still_used,
+        "elapsed_s": round(elapsed, 3),
+        "submits_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency": summarize(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,4,8,16", help="comma separated parallel client counts")
+    parser.add_argument("--submissions-per-client", type=int, default=20)
+    parser.add_argument("--modes", default="inline,deferred")
+    args = parser.parse_args()
+    levels = [int(value) for value in args.clients.split(",")]
+
+    bootstrap()
+    from app.core.config import get_settings
+    from app.db.migrations import migrate
+    from app.db.session import SessionLocal
+
+    migrate()
+    settings = get_settings()
+    modes = args.modes.split(",")
+    per_level = max(levels) * args.submissions_per_client
+    db = SessionLocal()
+    seed_images(
+        db,
+        correct=per_level * settings.default_num_questions,
+        incorrect=per_level * settings.default_num_questions * (settings.default_num_options - 1),
+    )
+    # Every level submits a fresh set of users, each with a single open session.
+    user_ids = iter(seed_users(db, sum(levels) * len(modes) * args.submissions_per_client))
+    db.close()
+
+    runs = []
+    for clients in levels:
+        for mode in modes:
+            batch = [next(user_ids) for _ in range(clients * args.submissions_per_client)]
+            runs.append(_run_level(mode, clients, batch, args.submissions_per_client))
+    emit({"benchmark": "submit_latency", "levels": runs})
+
+
+if __name__ == "__main__":
+    main()
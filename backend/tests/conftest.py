@@ -0,0 +1,46 @@
+"""Fixtures for API tests against a throwaway SQLite database.
+
+The application reads its configuration at import time, so ``DATABASE_URL`` is
+set here, before anything under ``app`` is imported.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='quiz-test-'), 'test.db')}"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.db.migrations import migrate  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    migrate()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    settings = get_settings()
+    response = client.post(
+        "/api/admin/login", json={"username": settings.admin_username, "password": settings.admin_password}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def images(client, admin_headers):
+    """Enough images for a handful of quizzes with the default settings."""
+    payload = [{"file_url": f"https://img.example.com/c/{i}.png", "type": "correct"} for i in range(50)] + [
+        {"file_url": f"https://img.example.com/i/{i}.png", "type": "incorrect"} for i in range(450)
+    ]
+    response = client.post("/api/admin/images", json=payload, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models import QuizQuestion
+
+
+def _login(client, employee_id: str) -> dict:
+    response = client.post("/api/login", json={"employee_id": employee_id, "name": f"Employee {employee_id}"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_submit_with_foreign_image_ids_scores_them_wrong(client, images):
+    headers = _login(client, "foreign-ids")
+    quiz = client.get("/api/quiz", headers=headers).json()
+    questions = quiz["questions"]
+    offered = {option["image_id"] for question in questions for option in question["options"]}
+    not_offered = next(image["id"] for image in images if image["id"] not in offered)
+    foreign_ids = [not_offered, 10**9, 2**40, 0, -1]
+
+    answers = [
+        {"question_id": question["question_id"], "selected_image_id": foreign_ids[index]}
+        for index, question in enumerate(questions[: len(foreign_ids)])
+    ] + [
+        {"question_id": question["question_id"], "selected_image_id": question["options"][0]["image_id"]}
+        for question in questions[len(foreign_ids) :]
+    ]
+    response = client.post("/api/quiz/submit", json={"session_id": quiz["session_id"], "answers": answers}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    db = SessionLocal()
+    try:
+        selected = dict(
+            db.execute(
+                select(QuizQuestion.public_id, QuizQuestion.selected_image_id).where(
+                    QuizQuestion.session_id == quiz["session_id"]
+                )
+            ).all()
+        )
+    finally:
+        db.close()
+    for question in questions[: len(foreign_ids)]:
+        assert selected[question["question_id"]] is None
+    for question in questions[len(foreign_ids) :]:
+        assert selected[question["question_id"]] == question["options"][0]["image_id"]
+    # The first answers can only be wrong; the rest pick an offered image, right or not.
+    assert response.json()["score"] <= (len(questions) - len(foreign_ids)) * 100 // len(questions)